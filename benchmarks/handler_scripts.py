@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Per-handler cost of running a response handler script on a fresh js2py context, as bogi used to,
+against ScriptCache's compiled scripts and pooled contexts, and the same checks as a Python handler.
+
+    python -m benchmarks.handler_scripts [--runs 200] [--script examples/scripts/my-script.js]
+                                         [--python-script examples/scripts/my-script.py]
+"""
+import argparse
+import os
+import time
+from types import SimpleNamespace
+
+import js2py
+
+from bogi.response_handler import HttpClient, HttpResponse
+from bogi.script_cache import PythonScriptCache, ScriptCache
+
+EXAMPLE_SCRIPT = os.path.join(os.path.dirname(__file__), '../examples/scripts/my-script.js')
+EXAMPLE_PYTHON_SCRIPT = os.path.join(os.path.dirname(__file__), '../examples/scripts/my-script.py')
+
+
+def fake_response():
+    resp = SimpleNamespace(status_code=410, encoding='utf-8', headers={'Content-Type': 'application/json'})
+    resp.json = lambda: {'headers': {}}
+    return resp
+
+
+def fresh_context(script, resp):
+    js2py.EvalJs({'client': HttpClient(), 'response': HttpResponse(resp)}).execute(script)
+
+
+def measure(name, runs, fn):
+    start = time.perf_counter()
+    errors = 0
+    for _ in range(runs):
+        try:
+            fn()
+        except Exception:
+            errors += 1
+    per_handler = (time.perf_counter() - start) * 1000 / runs
+    print(f'{name:<24} {per_handler:8.3f} ms/handler ({errors} handlers raised)')
+    return per_handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--script', type=str, default=EXAMPLE_SCRIPT)
+    parser.add_argument('--python-script', type=str, default=EXAMPLE_PYTHON_SCRIPT)
+    args = parser.parse_args()
+
+    with open(args.script, 'r', encoding='utf-8') as f:
+        script = f.read()
+    with open(args.python_script, 'r', encoding='utf-8') as f:
+        python_script = f.read()
+    resp = fake_response()
+    cache = ScriptCache()
+    # warm up imports and the first js2py context
+    fresh_context(script, resp)
+
+    before = measure('fresh js2py context', args.runs, lambda: fresh_context(script, resp))
+    after = measure('ScriptCache', args.runs, lambda: cache.execute(script, {
+        'client': HttpClient(),
+        'response': HttpResponse(resp),
+    }))
+    print(f'{before / after:.1f}x faster')
+
+    python_cache = PythonScriptCache()
+    python = measure('PythonScriptCache', args.runs, lambda: python_cache.execute(python_script, {
+        'client': HttpClient(),
+        'response': HttpResponse(resp),
+    }))
+    print(f'{after / python:.1f}x faster than ScriptCache')
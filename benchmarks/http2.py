@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Throughput of many concurrent requests to a single host over HTTP/1.1, one request per connection at a time,
+against HTTP/2, multiplexing them as streams of a single connection, on a local server answering every request
+after a fixed delay. On loopback both are bound by the client's CPU, HTTP/2 rather saves connections: one per
+host instead of one per request in flight, each of them a TCP and often a TLS handshake to a remote host.
+Needs httpx with HTTP/2 support: pip install httpx[http2]
+
+    python -m benchmarks.http2 [--requests 500] [--concurrency 50] [--delay 0.02]
+"""
+import argparse
+import multiprocessing
+import threading
+import time
+
+from bogi.async_runner import AsyncHttpRunner
+from bogi.http_runner import HttpRunner
+from bogi.parser.main import Parser
+from bogi.transport import Transport
+from test.http2_server import Server
+
+
+def serve_in_process(server, urls):
+    urls.put(server.start())
+    threading.Event().wait()
+
+
+def run(url, requests, concurrency, http2):
+    code = '\n'.join(f'###\n// @no-cookie-jar\nGET {url}/{i}' for i in range(requests))
+    HttpRunner.http2 = http2
+    try:
+        runner = HttpRunner(Parser(parser='lalr').parse(code), ignore_headers=True)
+        start = time.perf_counter()
+        callbacks = AsyncHttpRunner(concurrency=concurrency).run([runner])
+        elapsed = time.perf_counter() - start
+    finally:
+        HttpRunner.http2 = False
+    failures = callbacks[0].failures
+    if failures:
+        raise SystemExit(f'{len(failures)} requests failed, e.g. {failures[0].error}')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--delay', type=float, default=0.02, help='Seconds the server takes to answer a request')
+    args = parser.parse_args()
+
+    Transport.pool_maxsize = args.concurrency
+    server = Server(delay=args.delay)
+    # the server runs on a process of its own, so it doesn't compete with the client for the GIL
+    urls = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve_in_process, args=(server, urls), daemon=True)
+    process.start()
+    url = urls.get()
+    try:
+        for name, http2 in [('HTTP/1.1', False), ('HTTP/2', True)]:
+            connections = server.connections
+            elapsed = run(url, args.requests, args.concurrency, http2)
+            print(f'{name:<9} {args.requests / elapsed:8.0f} requests/s  {elapsed * 1000:8.0f} ms  '
+                  f'{server.connections - connections} connections')
+    finally:
+        process.terminate()
+
+
+if __name__ == '__main__':
+    main()
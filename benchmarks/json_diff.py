@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Cost of diffing large synthetic JSON documents with JsonDiff, against the plain == comparison bodies were checked
+with before, for identical documents, a single difference deep in the document, and differences everywhere.
+
+    python -m benchmarks.json_diff [--records 50000] [--runs 5]
+"""
+import argparse
+import copy
+import json
+import time
+
+from bogi.json_diff import JsonDiff
+
+
+def make_document(records):
+    return {
+        'meta': {'generated': '2020-01-01T00:00:00Z', 'count': records},
+        'items': [{
+            'id': i,
+            'name': f'item {i}',
+            'price': i * 1.5,
+            'tags': ['a', 'b', str(i % 7)],
+            'owner': {'id': i % 100, 'active': i % 2 == 0},
+        } for i in range(records)],
+    }
+
+
+def measure(name, runs, fn):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{name:<36} {best:10.2f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    doc = make_document(args.records)
+    print(f'{args.records} records, {len(json.dumps(doc)) / 1e6:.1f} MB')
+
+    same = copy.deepcopy(doc)
+    one = copy.deepcopy(doc)
+    one['items'][-1]['owner']['active'] = not one['items'][-1]['owner']['active']
+    many = copy.deepcopy(doc)
+    for item in many['items']:
+        item['price'] += 1
+    timestamps = copy.deepcopy(doc)
+    timestamps['meta']['generated'] = '2020-01-02T00:00:00Z'
+
+    diff = JsonDiff()
+    measure('== identical', args.runs, lambda: doc == same)
+    measure('JsonDiff identical', args.runs, lambda: diff.diff(doc, same))
+    measure('== one difference', args.runs, lambda: doc == one)
+    measure('JsonDiff one difference', args.runs, lambda: diff.diff(doc, one))
+    measure('JsonDiff differences everywhere', args.runs, lambda: diff.diff(doc, many))
+    measure('JsonDiff ignoring the difference', args.runs,
+            lambda: JsonDiff(ignore=['$.meta.generated']).diff(doc, timestamps))
+    measure('JsonDiff ignoring $.items[*].price', args.runs,
+            lambda: JsonDiff(ignore=['$.items[*].price']).diff(doc, many))
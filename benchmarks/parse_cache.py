@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Time for a fresh process to parse a suite of .http files, cold with an empty ParsedFileCache directory, and warm
+after a previous run filled it. The suite is made of copies of the examples.
+
+    python -m benchmarks.parse_cache [--files 1000] [--runs 3] [--parser earley]
+"""
+import argparse
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), '../examples')
+
+
+def make_suite(directory, files):
+    examples = sorted(glob.glob(os.path.join(EXAMPLES_DIR, '*.http')))
+    for i in range(files):
+        example = examples[i % len(examples)]
+        with open(example, 'r') as f:
+            code = f.read()
+        # every file distinct, as in a real suite
+        with open(os.path.join(directory, f'{i:05d}-{os.path.basename(example)}'), 'w') as f:
+            f.write(code.rstrip('\n') + f'\n\n### copy-{i}\nGET http://example.com/{i}\n')
+
+
+def parse_in_process(suite_dir, cache_dir, parser):
+    from bogi.parser.cache import ParsedFileCache
+    from bogi.suite import parse_files
+
+    ParsedFileCache.directory = cache_dir
+    start = time.perf_counter()
+    parsed = parse_files(sorted(glob.glob(os.path.join(suite_dir, '*.http'))), parser=parser)
+    print(f'{(time.perf_counter() - start) * 1000} {sum(len(reqs) for _, reqs in parsed)}')
+
+
+def parse_in_child(suite_dir, cache_dir, parser):
+    res = subprocess.run([sys.executable, '-m', 'benchmarks.parse_cache', '--child', suite_dir, cache_dir,
+                          '--parser', parser],
+                         stdout=subprocess.PIPE, universal_newlines=True, check=True,
+                         cwd=os.path.join(os.path.dirname(__file__), '..'))
+    ms, requests = res.stdout.split()
+    return float(ms), int(requests)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--parser', type=str, choices=['earley', 'lalr'], default='earley')
+    parser.add_argument('--child', nargs=2, metavar=('SUITE_DIR', 'CACHE_DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        parse_in_process(*args.child, args.parser)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        suite_dir = os.path.join(tmp, 'suite')
+        cache_dir = os.path.join(tmp, 'cache')
+        os.makedirs(suite_dir)
+        make_suite(suite_dir, args.files)
+
+        cold, warm = [], []
+        for _ in range(args.runs):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            ms, requests = parse_in_child(suite_dir, cache_dir, args.parser)
+            cold.append(ms)
+            warm.append(parse_in_child(suite_dir, cache_dir, args.parser)[0])
+
+    print(f'{args.files} files, {requests} requests, {args.parser} parser')
+    print(f'{"cold":<6} {min(cold):10.1f} ms')
+    print(f'{"warm":<6} {min(warm):10.1f} ms')
+    print(f'{min(cold) / min(warm):.1f}x faster')
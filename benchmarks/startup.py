@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Startup cost of the CLI, measured with `python -X importtime` on `bogi.py --help`, which imports everything a run
+needs before doing any work. Exits with 1 if a module only some runs need is imported at startup.
+
+    python -m benchmarks.startup [--runs 5] [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BOGI = os.path.join(os.path.dirname(__file__), '..', 'bogi.py')
+
+# imported on demand: js2py on the first JavaScript handler, elasticsearch with --es_hosts, httpx with --http2
+LAZY_MODULES = ['js2py', 'elasticsearch', 'httpx']
+
+
+def import_times():
+    """
+    Runs `bogi.py --help` under -X importtime, returning (module, cumulative microseconds) pairs of top level imports.
+    """
+    res = subprocess.run([sys.executable, '-X', 'importtime', BOGI, '--help'],
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = []
+    for line in res.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # nested imports are indented below the module importing them
+        times.append((name[1:].rstrip(), int(cumulative)))
+    return times
+
+
+def wall_time(runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run([sys.executable, BOGI, '--help'], stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000 / runs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    times = import_times()
+    top_level = [(name, t) for name, t in times if not name.startswith(' ')]
+    for name, t in sorted(top_level, key=lambda x: x[1], reverse=True)[:args.top]:
+        print(f'{name:<32} {t / 1000:8.1f} ms')
+    print(f'{"total imports":<32} {sum(t for _, t in top_level) / 1000:8.1f} ms')
+    print(f'{"bogi.py --help":<32} {wall_time(args.runs):8.1f} ms')
+
+    imported = {name.strip().split('.')[0] for name, _ in times}
+    eager = [m for m in LAZY_MODULES if m in imported]
+    if eager:
+        print(f'Imported at startup, should be imported on demand: {", ".join(eager)}')
+        sys.exit(1)
@@ -1,106 +1,299 @@
 #!/usr/bin/env python
+import atexit
 import datetime
+import json
 import os
 import sys
 import logging
+import threading
 import argparse
 from time import sleep
 from urllib.parse import urlparse
 
-import lark
-from elasticsearch import Elasticsearch, helpers
-
 from bogi import bcolors
-from bogi.callbacks import LoggerCallback
-from bogi.parser.main import Parser as BogiParser
+from bogi.dns import DnsCache, dns_cache
+from bogi.histogram import LatencyHistograms
+from bogi.http2 import INSTALL_HINT, http2_available
 from bogi.http_runner import HttpRunner
+from bogi.parser.cache import ParsedFileCache
+from bogi.parser.util import LarkCache
+from bogi.response_store import ResponseStore
+from bogi.result_store import ResultStore
 from bogi.logger import logger
+from bogi.scheduler import ScheduledFile, Scheduler, file_interval, parse_duration
+from bogi.suite import parse_files, run_files
+from bogi.transport import Transport
+from bogi.workers import FileRuntimes, run_in_workers
 
-es = None
-report_to_es = False
+es_reporter = None
+result_store = None
+metrics = None
+# files run concurrently with --schedule
+report_lock = threading.Lock()
+file_runtimes = FileRuntimes()
 
 
-def run(base_dir):
-    es_actions = []
+def run(base_dir, paths):
     success_count = 0
+    handler_times = {}
+    histograms = LatencyHistograms() if args.aggregate else None
 
-    for path in http_paths:
-        with open(path, 'r') as file:
-            fname = os.path.basename(path)
-
-            try:
-                requests = BogiParser().parse(file.read())
-            except lark.LarkError as e:
-                logger.error(f'{bcolors.WARNING}Parsing error in {fname}{bcolors.ENDC}\n{str(e)}')
-                continue
-
-            logger.info(f'{bcolors.HEADER}Processing {fname}, {len(requests)} requests.{bcolors.ENDC}')
-
-            try:
-                with HttpRunner(requests, base_dir=base_dir, callback=LoggerCallback(logger),
-                                ignore_headers=True) as hr:
-                    callback = hr.run()
-
-                if report_to_es:
-                    index_name = 'bogi-reports-' + datetime.date.today().strftime('%Y.%m.%d')
-                    es_actions.extend([{
-                        '_index': index_name,
-                        '_source': {
-                            'request_id': '',
-                            'request': {
-                                'url': s.request.target,
-                                'method': s.request.method,
-                                'domain': urlparse(s.request.target).netloc,
-                            },
-                            'success': True,
-                            'latency': s.latency,
-                            'response_time': s.response_time,
-                        }
-                    } for s in callback.successes
-                    ])
-                    es_actions.extend([{
-                        '_index': index_name,
-                        '_source': {
-                            'request_id': '',
-                            'request': {
-                                'url': f.request.target,
-                                'method': f.request.method,
-                                'domain': urlparse(f.request.target).netloc,
-                            },
-                            'success': False,
-                            'response_time': f.response_time,
-                            'error': f.error,
-                        }
-                    } for f in callback.failures
-                    ])
-
-                if len(callback.failures) == 0:
-                    logger.info(f'\t{bcolors.OKGREEN}\u2713 Success{bcolors.ENDC}')
-                    success_count += 1
-
-            except Exception as e:
-                logger.fatal("Exception while running {}\n".format(fname))
-                logger.exception(e)
-
-    if report_to_es and len(es_actions):
-        helpers.bulk(es, es_actions, stats_only=True)
-
-    if len(http_paths) > success_count:
+    options = dict(parser=args.parser, concurrency=args.concurrency, host_concurrency=args.host_concurrency,
+                   print_graph=args.print_graph, aggregate=args.aggregate, metrics=metrics is not None,
+                   results=result_store is not None)
+    run_id = result_store.start_run() if result_store else None
+    if args.workers > 1 and len(paths) > 1:
+        results = run_in_workers(paths, base_dir, args.workers, file_runtimes, **options)
+    else:
+        results = run_files(paths, base_dir, **options)
+
+    for result in results:
+        fname = os.path.basename(result.path)
+        callback = result.callback
+        file_runtimes.update(result.path, result.runtime)
+        if metrics and not isinstance(callback, Exception):
+            metrics.merge(result.path, callback.metrics, result.runtime)
+        try:
+            if isinstance(callback, Exception):
+                raise callback
+
+            for language, times in callback.handler_times.items():
+                handler_times.setdefault(language, []).extend(times)
+
+            if histograms and callback.histograms:
+                histograms.merge(callback.histograms)
+
+            if es_reporter:
+                es_reporter.report(es_report_actions(callback))
+
+            if result_store:
+                result_store.report(run_id, callback.results)
+
+            if len(callback.failures) == 0:
+                logger.info(f'\t{bcolors.OKGREEN}\u2713 Success ({fname}){bcolors.ENDC}')
+                success_count += 1
+
+        except Exception as e:
+            logger.fatal("Exception while running {}\n".format(fname))
+            logger.exception(e)
+
+    file_runtimes.save()
+
+    if result_store:
+        report_regressions(run_id)
+
+    logger.info(f'Connections: {Transport.stats.summary()}')
+    if DnsCache.ttl:
+        logger.info(f'DNS: {dns_cache.summary()}')
+
+    for language, times in sorted(handler_times.items()):
+        logger.info(f'{language} response handlers: {len(times)} runs, '
+                    f'{sum(times) * 1000 / len(times):.3f}ms avg, {sum(times) * 1000:.1f}ms total')
+
+    if histograms:
+        logger.info(histograms.table())
+        report_percentiles(histograms)
+
+    if len(paths) > success_count:
         logger.fatal(f'{bcolors.BOLD}{bcolors.FAIL}{success_count} requests passed checks, '
-                     f'{len(http_paths) - success_count} failed.{bcolors.ENDC}')
+                     f'{len(paths) - success_count} failed.{bcolors.ENDC}')
     else:
-        logger.info(f'{bcolors.BOLD}{bcolors.OKGREEN}{success_count}/{http_paths} requests passed.{bcolors.ENDC}')
+        logger.info(f'{bcolors.BOLD}{bcolors.OKGREEN}{success_count}/{paths} requests passed.{bcolors.ENDC}')
+
+    return success_count, len(paths) - success_count
+
+
+def run_load(base_dir):
+    from bogi.load import LoadGenerator
+
+    files = parse_files(http_paths, parser=args.parser)
+    duration = parse_duration(args.duration)
+    model = f'{args.rate:g} requests/s' if args.rate else f'{args.users} users'
+    logger.info(f'{bcolors.HEADER}Load testing {len(files)} files with {model} for {duration:g}s{bcolors.ENDC}')
+
+    load = LoadGenerator(files, base_dir, duration, rate=args.rate, users=args.users,
+                         max_in_flight=args.max_in_flight).run()
+    logger.info(load.summary())
+    logger.info(f'Connections: {Transport.stats.summary()}')
+    if DnsCache.ttl:
+        logger.info(f'DNS: {dns_cache.summary()}')
+    return load
+
+
+def run_scheduled(base_dir):
+    files = []
+    for path in http_paths:
+        parsed = parse_files([path], parser=args.parser)
+        requests = parsed[0][1] if parsed else []
+        files.append(ScheduledFile(path=path, interval=file_interval(requests, default=args.loop_sleep)))
+        logger.info(f'{bcolors.HEADER}Scheduling {os.path.basename(path)} every {files[-1].interval:g}s{bcolors.ENDC}')
+
+    scheduler = Scheduler(files, lambda path: run(base_dir, [path]), concurrency=args.schedule_concurrency,
+                          jitter=args.jitter)
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.stop()
 
-    return success_count, len(http_paths) - success_count
+
+def run_watch(base_dir):
+    from bogi.watch import FileWatcher
+
+    watcher = FileWatcher(args.http_path, base_dir, parser=args.parser)
+    run(base_dir, http_paths)
+    try:
+        while True:
+            logger.info(f'{bcolors.WARNING}Watching {args.http_path} for changes{bcolors.ENDC}')
+            paths = sorted(watcher.wait())
+            logger.info(f'{bcolors.HEADER}Changed: {", ".join(os.path.basename(p) for p in paths)}{bcolors.ENDC}')
+            run(base_dir, paths)
+    except KeyboardInterrupt:
+        pass
+
+
+def report_percentiles(histograms):
+    timestamp = datetime.datetime.utcnow().isoformat()
+    rows = [dict(row._asdict(), timestamp=timestamp) for row in histograms.rows()]
+
+    if es_reporter:
+        index_name = 'bogi-percentiles-' + datetime.date.today().strftime('%Y.%m.%d')
+        es_reporter.report([{'_index': index_name, '_source': row} for row in rows])
+
+    if args.percentiles_file:
+        with report_lock, open(args.percentiles_file, 'a') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+
+
+def report_regressions(run_id):
+    result_store.finish_run(run_id)
+    regressions = result_store.regressions(run_id, baseline_runs=args.regression_runs,
+                                           threshold=args.regression_threshold)
+    for r in regressions:
+        logger.warning(f'{bcolors.WARNING}Response time regression of {r.method} {r.request}: p95 {r.value:.1f}ms, '
+                       f'{r.ratio:.1f}x the p95 of the last {args.regression_runs} runs ({r.baseline:.1f}ms)'
+                       f'{bcolors.ENDC}')
+
+
+def es_report_actions(callback):
+    index_name = 'bogi-reports-' + datetime.date.today().strftime('%Y.%m.%d')
+    return [{
+        '_index': index_name,
+        '_source': {
+            'request_id': '',
+            'request': {
+                'url': s.request.target,
+                'method': s.request.method,
+                'domain': urlparse(s.request.target).netloc,
+            },
+            'success': True,
+            'latency': s.latency,
+            'response_time': s.response_time,
+            'timings': s.timings._asdict() if s.timings else None,
+        }
+    } for s in callback.successes
+    ] + [{
+        '_index': index_name,
+        '_source': {
+            'request_id': '',
+            'request': {
+                'url': f.request.target,
+                'method': f.request.method,
+                'domain': urlparse(f.request.target).netloc,
+            },
+            'success': False,
+            'response_time': f.response_time,
+            'timings': f.timings._asdict() if f.timings else None,
+            'error': f.error,
+        }
+    } for f in callback.failures
+    ]
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('http_path', type=str, help='.http files directory or single .http file path')
     parser.add_argument('--es_hosts', type=str, help='Elasticsearch hosts to index results into', required=False)
+    parser.add_argument('--es-batch-size', type=int, default=500,
+                        help='How many results to send to Elasticsearch in a single bulk request')
+    parser.add_argument('--es-flush-interval', type=float, default=5.0,
+                        help='Seconds results may wait to be sent to Elasticsearch before a smaller bulk is sent')
+    parser.add_argument('--es-spool-file', type=str, required=False,
+                        help='File to keep results in while Elasticsearch is unreachable, sent once it is back')
+    parser.add_argument('--aggregate', action='store_true',
+                        help='Keep latency histograms instead of every result, logging and reporting p50/p90/p99/max '
+                             'per request ID, URL and host once per loop')
+    parser.add_argument('--percentiles-file', type=str, required=False,
+                        help='File to append the percentiles of every loop to as JSON lines, with --aggregate')
+    parser.add_argument('--results-db', type=str, required=False,
+                        help='SQLite database to store the results of every run in, query it with '
+                             '`python -m bogi.result_store`')
+    parser.add_argument('--regression-runs', type=int, default=20,
+                        help='How many previous runs of each request to compare response times to, with --results-db')
+    parser.add_argument('--regression-threshold', type=float, default=1.5,
+                        help='How many times the p95 response time of the previous runs a request\'s may reach '
+                             'before it is reported as a regression, with --results-db')
+    parser.add_argument('--metrics-port', type=int, required=False,
+                        help='Serve Prometheus metrics of the checks run so far at /metrics on this port')
+    parser.add_argument('--load', action='store_true',
+                        help='Send the requests as load for --duration, at a constant --rate or with --users, '
+                             'and report throughput, errors and latency percentiles')
+    parser.add_argument('--rate', type=float, required=False,
+                        help='Requests per second to send with --load, whether or not earlier ones completed')
+    parser.add_argument('--users', type=int, required=False,
+                        help='Virtual users to run with --load, each sending its next request once the last completed')
+    parser.add_argument('--duration', type=str, default='60s', help='How long to run --load for, e.g. 30s or 5m')
+    parser.add_argument('--max-in-flight', type=int, default=256,
+                        help='How many requests may be in flight at once with --load --rate')
     parser.add_argument('--quiet', '-q', action='store_true', help='Only log errors')
+    parser.add_argument('--watch', action='store_true',
+                        help='Run the files, then run again the files which changed, or whose response handler '
+                             'scripts or body files changed, until interrupted')
     parser.add_argument('--loops', type=int, help='How many times to loop (0-1=once, -1=indefinitely)', default=0)
     parser.add_argument('--loop-sleep', type=int, help='How many seconds to sleep between loops', default=10)
+    parser.add_argument('--schedule', action='store_true',
+                        help='Run every file on its own timer, every --loop-sleep seconds or its @interval option, '
+                             'instead of looping over all files')
+    parser.add_argument('--schedule-concurrency', type=int, default=4,
+                        help='How many files may run at once with --schedule')
+    parser.add_argument('--jitter', type=float, default=0.1,
+                        help='Random delay added to scheduled runs, as a fraction of their interval')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='How many requests to send at once, files and independent requests run in parallel')
+    parser.add_argument('--host-concurrency', type=int, required=False,
+                        help='How many requests to send at once to a single host (default: --concurrency)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='How many processes to run files on, files are balanced by their past runtime')
+    parser.add_argument('--runtimes-file', type=str, required=False,
+                        help='JSON file to keep past file runtimes in across runs, for balancing --workers')
+    parser.add_argument('--pool-size', type=int, required=False,
+                        help='Connections to keep open per host, by default enough for --concurrency, --users or '
+                             '--max-in-flight')
+    parser.add_argument('--pool-hosts', type=int, default=100, help='Hosts to keep connections open to')
+    parser.add_argument('--dns-ttl', type=float, default=0,
+                        help='Seconds to cache resolved host names for, by default every connection resolves again')
+    parser.add_argument('--dns-negative-ttl', type=float, default=DnsCache.negative_ttl,
+                        help='Seconds to cache host names which failed to resolve for, with --dns-ttl')
+    parser.add_argument('--dns-prefetch', action='store_true',
+                        help='Resolve the hosts of all requests at startup, with --dns-ttl')
+    parser.add_argument('--http2', action='store_true',
+                        help='Send requests over HTTP/2 unless their request line has another HTTP version, '
+                             'multiplexing concurrent requests to a host on one connection')
+    parser.add_argument('--print-graph', action='store_true',
+                        help='Log the dependency graph of the requests in each file before running it')
+    parser.add_argument('--parser', type=str, choices=['earley', 'lalr'], default='earley',
+                        help='Lark parser to parse .http files with, lalr is considerably faster on long bodies')
+    parser.add_argument('--parser-cache-dir', type=str, help='Directory to save built parsers to across runs',
+                        required=False)
+    parser.add_argument('--requests-cache-dir', type=str, required=False,
+                        help='Directory to save parsed .http files to across runs')
+    parser.add_argument('--max-diffs', type=int, default=20,
+                        help='How many differences to report for a response not matching its reference')
+    parser.add_argument('--spill-dir', type=str, required=False,
+                        help='Directory to keep large referenced response bodies in until they are compared, '
+                             'instead of the system\'s temporary directory')
+    parser.add_argument('--script-cache-dir', type=str, required=False,
+                        help='Directory to save translated response handler scripts to across runs')
     args = parser.parse_args()
 
     if args.quiet:
@@ -110,13 +303,69 @@ if __name__ == '__main__':
         logger.error("{} does not exist".format(args.http_path))
         sys.exit(2)
 
+    if args.runtimes_file:
+        file_runtimes = FileRuntimes(args.runtimes_file)
+
+    Transport.pool_connections = args.pool_hosts
+    if args.pool_size:
+        Transport.pool_maxsize = args.pool_size
+    else:
+        concurrent = args.concurrency * args.schedule_concurrency if args.schedule else args.concurrency
+        if args.load:
+            concurrent = args.users or args.max_in_flight
+        Transport.pool_maxsize = max(Transport.pool_maxsize, concurrent)
+    # the pools are shared by every run, their connections are closed once the last one is done
+    atexit.register(Transport.close)
+
+    DnsCache.ttl = args.dns_ttl
+    DnsCache.negative_ttl = args.dns_negative_ttl
+
+    if args.http2:
+        if not http2_available():
+            logger.error(INSTALL_HINT)
+            sys.exit(2)
+        HttpRunner.http2 = True
+
+    if args.parser_cache_dir:
+        LarkCache.directory = args.parser_cache_dir
+
+    if args.requests_cache_dir:
+        ParsedFileCache.directory = args.requests_cache_dir
+
+    HttpRunner.max_differences = args.max_diffs
+
+    if args.spill_dir:
+        ResponseStore.spill_directory = args.spill_dir
+
+    if args.script_cache_dir:
+        HttpRunner.script_cache.directory = args.script_cache_dir
+
     if args.es_hosts:
+        # only imported when reporting, it adds considerably to startup time
+        from elasticsearch import Elasticsearch
+        from bogi.es_reporter import EsReporter
         es = Elasticsearch(hosts=args.es_hosts)
         if not es.ping():
-            raise Exception(f'Elasticsearch at {args.es_hosts} is unavailable, quitting')
-        report_to_es = True
+            if not args.es_spool_file:
+                raise Exception(f'Elasticsearch at {args.es_hosts} is unavailable, quitting')
+            logger.warning(f'Elasticsearch at {args.es_hosts} is unavailable, '
+                           f'spooling results to {args.es_spool_file}')
+        es_reporter = EsReporter(es, batch_size=args.es_batch_size, flush_interval=args.es_flush_interval,
+                                 spool_path=args.es_spool_file)
+        # results still queued are sent before exiting
+        atexit.register(es_reporter.close)
         logger.info(f'{bcolors.WARNING}Elasticsearch at {args.es_hosts} configured{bcolors.ENDC}')
 
+    if args.results_db:
+        result_store = ResultStore(args.results_db)
+        atexit.register(result_store.close)
+
+    if args.metrics_port is not None:
+        from bogi.metrics import MetricsRegistry, MetricsServer
+        metrics = MetricsRegistry()
+        MetricsServer(metrics, args.metrics_port)
+        logger.info(f'{bcolors.WARNING}Serving metrics at http://0.0.0.0:{args.metrics_port}/metrics{bcolors.ENDC}')
+
     if os.path.isdir(args.http_path):
         http_paths = [os.path.join(args.http_path, fname)
                       for fname in os.listdir(args.http_path)]
@@ -126,18 +375,34 @@ if __name__ == '__main__':
         base_dir = os.path.dirname(args.http_path)
     http_paths = [path for path in http_paths if path.endswith('.http')]
 
-    if args.loops > 1:
+    if args.dns_prefetch and args.dns_ttl:
+        # parsed files are kept, running them doesn't parse them again
+        targets = [req.target for _, requests in parse_files(http_paths, parser=args.parser) for req in requests]
+        failed = dns_cache.prefetch(targets)
+        logger.info(f'Resolved the hosts of {len(targets)} requests, {failed} failed')
+
+    if args.load:
+        if (args.rate is None) == (args.users is None):
+            logger.error('--load takes either --rate or --users')
+            sys.exit(2)
+        load = run_load(base_dir)
+        sys.exit(1 if load.callback.errors else 0)
+    elif args.schedule:
+        run_scheduled(base_dir)
+    elif args.watch:
+        run_watch(base_dir)
+    elif args.loops > 1:
         for i in range(args.loops):
-            run(base_dir)
+            run(base_dir, http_paths)
             logger.info(f'[{i+1}/{args.loops}] {bcolors.WARNING}Sleeping for {args.loop_sleep} seconds{bcolors.ENDC}')
             sleep(args.loop_sleep)
     elif args.loops == -1:
         while True:
-            run(base_dir)
+            run(base_dir, http_paths)
             logger.info(f'[\u221E] {bcolors.WARNING}Sleeping for {args.loop_sleep} seconds{bcolors.ENDC}')
             sleep(args.loop_sleep)
     else:
-        successes, failures = run(base_dir)
+        successes, failures = run(base_dir, http_paths)
         if failures > 0:
             sys.exit(1)
         else:
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+class AsyncHttpRunner:
+    """
+    Runs the requests of several HttpRunners concurrently on an asyncio event loop.
+    Requests are sent and checked on a thread pool by their HttpRunner, the event loop only schedules them,
+    following each runner's RequestGraph: a request starts once the requests it depends on are done,
+    and is skipped if any of those it requires failed.
+    """
+
+    def __init__(self, concurrency=10, host_concurrency=None):
+        self.concurrency = concurrency
+        self.host_concurrency = host_concurrency
+        self._executor = None
+        self._semaphore = None
+        self._host_semaphores = {}
+
+    def run(self, runners):
+        """
+        Runs all runners to completion, returning their callbacks in the same order.
+        A runner which raised is returned as its exception instead.
+        """
+        return asyncio.run(self._run_all(runners))
+
+    async def _run_all(self, runners):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._host_semaphores = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            self._executor = executor
+            return await asyncio.gather(*[self._run_file(runner) for runner in runners], return_exceptions=True)
+
+    async def _run_file(self, runner):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        graph = runner.graph
+        tasks = []
+        for i, req in enumerate(runner.requests):
+            deps = {d: tasks[d] for d in graph.depends_on(i)}
+            tasks.append(asyncio.ensure_future(self._run_request(runner, req, deps, graph.requires(i))))
+        await asyncio.gather(*tasks)
+
+        await loop.run_in_executor(self._executor, runner.compare_responses)
+        runner.runtime = time.perf_counter() - start
+        return runner.callback
+
+    async def _run_request(self, runner, req, deps, required):
+        """
+        Returns whether the request ran successfully, see `HttpRunner.run_request`.
+        The request waits for all of `deps`, and is skipped if any of the `required` ones failed.
+        """
+        loop = asyncio.get_running_loop()
+        if deps:
+            await asyncio.wait(deps.values())
+            failed_deps = {i for i in required if not deps[i].result()}
+            if failed_deps:
+                runner.skip_request(req, failed_deps)
+                return False
+
+        async with self._host_semaphore(req), self._semaphore:
+            return await loop.run_in_executor(self._executor, runner.run_request, req)
+
+    def _host_semaphore(self, req):
+        host = urlparse(req.target).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.host_concurrency or self.concurrency)
+        return self._host_semaphores[host]
@@ -1,16 +1,47 @@
+import threading
+
 from bogi import bcolors
+from bogi.histogram import LatencyHistograms
 
 
 class CallbackBase:
+    # keeping every success grows without bound on long runs, HistogramCallback keeps latency histograms instead
+    keep_successes = True
+    histograms = None
+    # RequestMetrics to count checks in, when exporting metrics
+    metrics = None
+    # RequestResults to keep results in, when storing them
+    results = None
+
     def __init__(self):
         self.successes = []
         self.failures = []
+        # language -> seconds each response handler script run took
+        self.handler_times = {}
+
+    def handler_time(self, language, seconds):
+        self.handler_times.setdefault(language, []).append(seconds)
 
     def failure(self, f):
         self.failures.append(f)
+        if self.metrics is not None:
+            self.metrics.record(f, success=False)
+        if self.results is not None:
+            self.results.record(f, success=False)
 
     def success(self, s):
-        self.successes.append(s)
+        if self.keep_successes:
+            self.successes.append(s)
+        if self.metrics is not None:
+            self.metrics.record(s, success=True)
+        if self.results is not None:
+            self.results.record(s, success=True)
+
+
+def format_timings(timings):
+    if timings is None:
+        return ''
+    return ' (' + ' / '.join(f'{phase}: {ms:.1f}ms' for phase, ms in timings._asdict().items()) + ')'
 
 
 class LoggerCallback(CallbackBase):
@@ -20,10 +51,33 @@ class LoggerCallback(CallbackBase):
 
     def failure(self, f):
         super().failure(f)
-        self.logger.error(f'\t{bcolors.FAIL}Check {f.request.method} {f.request.target} failed\n\t'
-                          f'{f.error}{bcolors.ENDC}')
+        self.logger.error(f'\t{bcolors.FAIL}Check {f.request.method} {f.request.target} failed'
+                          f'{format_timings(f.timings)}\n\t{f.error}{bcolors.ENDC}')
 
     def success(self, s):
         super().success(s)
         self.logger.info(f'\t{bcolors.OKCYAN}Check {s.request.method} {s.request.target} succeeded'
-                         f' (latency: {s.latency}ms / response time: {s.response_time}ms){bcolors.ENDC}')
+                         f' (latency: {s.latency:.1f}ms / response time: {s.response_time:.1f}ms)'
+                         f'{format_timings(s.timings)}{bcolors.ENDC}')
+
+
+class HistogramCallback(LoggerCallback):
+    """
+    Logs checks, keeping failures but only the latency histograms of successes.
+    """
+    keep_successes = False
+
+    def __init__(self, logger):
+        super(HistogramCallback, self).__init__(logger)
+        self.histograms = LatencyHistograms()
+        self._lock = threading.Lock()
+
+    def failure(self, f):
+        super().failure(f)
+        with self._lock:
+            self.histograms.record(f.request, f.response_time, failed=True)
+
+    def success(self, s):
+        super().success(s)
+        with self._lock:
+            self.histograms.record(s.request, s.response_time)
@@ -0,0 +1,104 @@
+import queue
+import threading
+import time
+
+from bogi.logger import logger
+
+_FLUSH = object()
+_STOP = object()
+
+
+class Recorder:
+    """
+    Base of the results a file's checks are recorded into by its runner's threads. They're sent back from worker
+    processes, so the lock is left out when pickled and a new one is created when unpickled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class BackgroundWriter:
+    """
+    Writes queued items from a background thread, so storing them doesn't hold up sending requests.
+    Items are written by `_write` in batches of `batch_size`, or once the oldest queued item waited
+    `flush_interval` seconds when given. The queue holds at most `queue_size` items, putting blocks while it is full.
+    """
+    batch_size = 1
+    flush_interval = None
+
+    def __init__(self, name, queue_size=0):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        self._queue.put(item)
+
+    def flush(self):
+        """
+        Blocks until every item put so far was written.
+        """
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self):
+        self.flush()
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _write(self, batch):
+        raise NotImplementedError
+
+    def _write_failed(self, batch, e):
+        logger.exception(e)
+
+    def _stopped(self):
+        """
+        Called from the background thread once it wrote its last batch.
+        """
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                try:
+                    self._stopped()
+                finally:
+                    self._queue.task_done()
+                return
+
+            if item is not None and item is not _FLUSH:
+                batch.append(item)
+                if deadline is None and self.flush_interval is not None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (item is None or item is _FLUSH or len(batch) >= self.batch_size):
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    # keep the thread alive, flush() would block forever otherwise
+                    self._write_failed(batch, e)
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+                deadline = None
+
+            if item is _FLUSH:
+                self._queue.task_done()
@@ -0,0 +1,118 @@
+import os
+import socket
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# addresses as getaddrinfo returns them, or the socket.gaierror the lookup failed with; expires is a monotonic time
+DnsEntry = namedtuple('DnsEntry', ['addresses', 'error', 'expires'])
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class DnsCache:
+    """
+    getaddrinfo results kept for `ttl` seconds, and failed lookups for `negative_ttl` seconds, so requests sent in
+    loops don't wait for the system resolver every time. The system resolver doesn't tell the TTL of records, every
+    host is kept for the same time. Nothing is cached while `ttl` is 0.
+    Concurrent lookups of a host wait for a single one to resolve.
+    """
+    ttl = 0
+    negative_ttl = 5
+
+    def __init__(self):
+        # (host, port, family, type) -> DnsEntry
+        self._entries = {}
+        self._resolving = {}
+        self._process_lock = threading.Lock()
+        self._pid = os.getpid()
+        self.counts = Counter()
+
+    @property
+    def _lock(self):
+        # another thread may have held a lock when the process forked, it would never be released in forked workers
+        if self._pid != os.getpid():
+            self._process_lock = threading.Lock()
+            self._resolving = {}
+            self._pid = os.getpid()
+        return self._process_lock
+
+    def getaddrinfo(self, host, port, family=0, type=socket.SOCK_STREAM):
+        if not self.ttl:
+            return socket.getaddrinfo(host, port, family, type)
+
+        key = (host, port, family, type)
+        entry = self._fresh(key)
+        if entry is None:
+            with self._resolving_lock(key):
+                # resolved by another thread while this one waited
+                entry = self._fresh(key)
+                if entry is None:
+                    entry = self._resolve(key)
+        else:
+            self._count('hits')
+
+        if entry.error is not None:
+            raise socket.gaierror(*entry.error.args)
+        return entry.addresses
+
+    def prefetch(self, targets, max_workers=16):
+        """
+        Resolves the hosts of request targets ahead of the first request to them, returning how many
+        hosts failed to resolve.
+        """
+        keys = set()
+        for target in targets:
+            url = urlparse(target)
+            if url.hostname and url.scheme in DEFAULT_PORTS:
+                keys.add((url.hostname, url.port or DEFAULT_PORTS[url.scheme], 0, socket.SOCK_STREAM))
+        if not keys or not self.ttl:
+            return 0
+
+        def resolve(key):
+            with self._resolving_lock(key):
+                return self._resolve(key)
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as executor:
+            return sum(entry.error is not None for entry in executor.map(resolve, keys))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def summary(self):
+        c = self.counts
+        return f'{c["lookups"]} lookups ({c["failed"]} failed), {c["hits"]} served from cache'
+
+    def _fresh(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires > time.monotonic():
+            return entry
+        return None
+
+    def _resolve(self, key):
+        self._count('lookups')
+        try:
+            entry = DnsEntry(addresses=socket.getaddrinfo(*key), error=None, expires=time.monotonic() + self.ttl)
+        except socket.gaierror as e:
+            self._count('failed')
+            entry = DnsEntry(addresses=None, error=e, expires=time.monotonic() + self.negative_ttl)
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def _resolving_lock(self, key):
+        with self._lock:
+            if key not in self._resolving:
+                self._resolving[key] = threading.Lock()
+            return self._resolving[key]
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+
+# used by every connection of the process, forked workers start with the entries resolved before
+dns_cache = DnsCache()
@@ -0,0 +1,88 @@
+import json
+import os
+import time
+
+from elasticsearch import helpers
+from elasticsearch.exceptions import TransportError
+
+from bogi.concurrency import BackgroundWriter
+from bogi.logger import logger
+
+
+class EsReporter(BackgroundWriter):
+    """
+    Indexes bulk actions into Elasticsearch from a background thread, as they are reported.
+    Actions are sent in batches of `batch_size`, or once the oldest queued action waited `flush_interval` seconds.
+    The queue holds at most `queue_size` actions, reporting blocks while it is full. flush() blocks until every
+    action reported so far was sent, spooled or dropped.
+    Batches which still fail to send after `max_retries` are appended to `spool_path` as JSON lines when given,
+    and sent again after the next batch which goes through. Otherwise they are dropped.
+    """
+
+    def __init__(self, es, batch_size=500, flush_interval=5.0, queue_size=10000, max_retries=3, backoff=1.0,
+                 spool_path=None):
+        self.es = es
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.spool_path = spool_path
+        self.indexed = 0
+        self.spooled = 0
+        self.dropped = 0
+        super().__init__('bogi-es-reporter', queue_size=queue_size)
+
+    def report(self, actions):
+        for action in actions:
+            self.put(action)
+
+    def _write(self, batch):
+        if self._send(batch):
+            self._replay_spool()
+        elif self.spool_path:
+            self._spool(batch)
+        else:
+            self.dropped += len(batch)
+
+    def _write_failed(self, batch, e):
+        super()._write_failed(batch, e)
+        self.dropped += len(batch)
+
+    def _send(self, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                # bulk itself retries documents rejected with 429 Too Many Requests
+                success, errors = helpers.bulk(self.es, batch, stats_only=True, raise_on_error=False,
+                                               max_retries=self.max_retries, initial_backoff=self.backoff)
+                self.indexed += success
+                if errors:
+                    logger.error(f'Elasticsearch rejected {errors} of {len(batch)} results')
+                return True
+            except TransportError as e:
+                if attempt < self.max_retries:
+                    time.sleep(self.backoff * 2 ** attempt)
+                else:
+                    logger.error(f'Failed sending {len(batch)} results to Elasticsearch: {e}')
+        return False
+
+    def _spool(self, batch):
+        with open(self.spool_path, 'a', encoding='utf-8') as f:
+            for action in batch:
+                f.write(json.dumps(action) + '\n')
+        self.spooled += len(batch)
+
+    def _replay_spool(self):
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return
+
+        replay_path = self.spool_path + '.replay'
+        os.replace(self.spool_path, replay_path)
+        with open(replay_path, 'r', encoding='utf-8') as f:
+            actions = [json.loads(line) for line in f if line.strip()]
+        os.remove(replay_path)
+
+        logger.info(f'Sending {len(actions)} spooled results to Elasticsearch')
+        for i in range(0, len(actions), self.batch_size):
+            if not self._send(actions[i:i + self.batch_size]):
+                self._spool(actions[i:])
+                break
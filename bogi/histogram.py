@@ -0,0 +1,118 @@
+import math
+from collections import Counter, namedtuple
+from urllib.parse import urlparse
+
+PERCENTILES = [50, 90, 99]
+
+# kind is 'id', 'url' or 'host', latencies are in milliseconds
+PercentileRow = namedtuple('PercentileRow', ['kind', 'key', 'count', 'failures', 'p50', 'p90', 'p99', 'max'])
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram of millisecond latencies, HDR style: every value is counted in a bucket no wider than
+    `precision` of its value, so percentiles are within that relative error, in memory bounded by the range of
+    values rather than their number.
+    """
+    precision = 0.01
+    lowest = 0.001
+
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, ms):
+        self.buckets[self._bucket(ms)] += 1
+        self.count += 1
+        self.max = max(self.max, ms)
+
+    def record_corrected(self, ms, expected_interval):
+        """
+        Records `ms`, along with the samples a client sending every `expected_interval` ms would have seen while
+        waiting on this one, correcting for coordinated omission like HdrHistogram's recordValueWithExpectedInterval.
+        """
+        self.record(ms)
+        if expected_interval and expected_interval > 0:
+            missing = ms - expected_interval
+            while missing >= expected_interval:
+                self.record(missing)
+                missing -= expected_interval
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self._value(bucket), self.max)
+        return self.max
+
+    def _bucket(self, ms):
+        if ms <= self.lowest:
+            return 0
+        return math.ceil(math.log(ms / self.lowest, 1 + self.precision))
+
+    def _value(self, bucket):
+        # the upper bound of the bucket
+        return self.lowest * (1 + self.precision) ** bucket
+
+
+class LatencyHistograms:
+    """
+    Latency histograms and failure counts per request ID, URL and host.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.failures = Counter()
+
+    def record(self, request, ms=None, failed=False):
+        """
+        Counts a check of `request`, `ms` is left out for requests which got no response.
+        """
+        for key in self._keys(request):
+            if key not in self.histograms:
+                self.histograms[key] = LatencyHistogram()
+            if ms is not None and ms >= 0:
+                self.histograms[key].record(ms)
+            if failed:
+                self.failures[key] += 1
+
+    def merge(self, other):
+        for key, histogram in other.histograms.items():
+            if key not in self.histograms:
+                self.histograms[key] = LatencyHistogram()
+            self.histograms[key].merge(histogram)
+        self.failures.update(other.failures)
+
+    def rows(self):
+        order = {'id': 0, 'url': 1, 'host': 2}
+        for kind, key in sorted(self.histograms, key=lambda k: (order[k[0]], k[1])):
+            h = self.histograms[(kind, key)]
+            p50, p90, p99 = [h.percentile(p) for p in PERCENTILES]
+            yield PercentileRow(kind=kind, key=key, count=h.count, failures=self.failures[(kind, key)],
+                                p50=p50, p90=p90, p99=p99, max=h.max if h.count else None)
+
+    def table(self):
+        def ms(value):
+            return '-' if value is None else f'{value:.1f}ms'
+
+        lines = [f'{"":<6}{"":<60} {"count":>7} {"failed":>7} {"p50":>10} {"p90":>10} {"p99":>10} {"max":>10}']
+        for r in self.rows():
+            lines.append(f'{r.kind:<6}{r.key[:60]:<60} {r.count:>7} {r.failures:>7} {ms(r.p50):>10} {ms(r.p90):>10} '
+                         f'{ms(r.p99):>10} {ms(r.max):>10}')
+        return '\n'.join(lines)
+
+    def _keys(self, request):
+        keys = [('url', f'{request.method} {request.target}'), ('host', urlparse(request.target).netloc)]
+        if request.id:
+            keys.insert(0, ('id', request.id))
+        return keys
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+
+from requests.exceptions import ConnectionError, RequestException, Timeout, TooManyRedirects
+
+from bogi.request_plan import BodyStream
+from bogi.timing import record_phase
+
+INSTALL_HINT = 'HTTP/2 requires httpx with HTTP/2 support, install it with: pip install httpx[http2]'
+
+
+def http2_available():
+    try:
+        import httpx  # noqa: F401
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class Http2Transport:
+    """
+    httpx transports shared by every Http2Session of the process. HTTPS connections negotiate HTTP/2 with ALPN,
+    falling back to HTTP/1.1 for servers which don't support it, cleartext ones use HTTP/2 with prior knowledge.
+    Concurrent requests to a host are multiplexed as streams of a single connection.
+    """
+    _transports = None
+    _pid = None
+    _lock = threading.Lock()
+    _opening_locks = {}
+
+    @classmethod
+    def mounts(cls):
+        with cls._lock:
+            # connections aren't shared with forked worker processes
+            if cls._transports is None or cls._pid != os.getpid():
+                import httpx  # only imported when HTTP/2 is used
+
+                cls._transports = {
+                    'https://': httpx.HTTPTransport(http2=True),
+                    'http://': httpx.HTTPTransport(http1=False, http2=True),
+                }
+                cls._opening_locks = {}
+                cls._pid = os.getpid()
+            return cls._transports
+
+    @classmethod
+    def opening_lock(cls, origin):
+        """
+        Held by a thread from sending a request to `origin` until its headers were sent. httpcore numbers the
+        streams of a connection before writing their headers, threads racing in between would write them out of
+        order, which HTTP/2 servers reject as a protocol error.
+        """
+        with cls._lock:
+            if origin not in cls._opening_locks:
+                cls._opening_locks[origin] = threading.Lock()
+            return cls._opening_locks[origin]
+
+
+class Http2Session:
+    """
+    Sends requests over HTTP/2 with a cookie jar of its own, like a requests Session, returning httpx responses,
+    which HttpRunner checks the same way. Errors are raised as requests exceptions.
+    """
+
+    def __init__(self):
+        try:
+            import httpx
+        except ImportError:
+            raise RequestException(INSTALL_HINT)
+        self._httpx = httpx
+        mounts = Http2Transport.mounts()
+        # passing a transport keeps httpx from creating a default one, with an SSL context of its own, per session;
+        # requests doesn't time out by default either
+        self._client = httpx.Client(transport=mounts['https://'], mounts=mounts, timeout=None)
+
+    def request(self, method, url, headers=None, data=None, allow_redirects=True):
+        httpx = self._httpx
+        headers = dict(headers or {})
+        if type(data) is BodyStream:
+            headers['Content-Length'] = str(len(data))
+        try:
+            req = self._client.build_request(method, url, headers=headers, content=data)
+            lock = Http2Transport.opening_lock((req.url.scheme, req.url.host, req.url.port))
+
+            held = []
+
+            def trace(event, info):
+                # redirects are sent with the same trace, only the first request holds the lock
+                if held and event.endswith('.send_request_headers.complete'):
+                    held.pop().release()
+
+            req.extensions['trace'] = trace
+            start = time.perf_counter_ns()
+            lock.acquire()
+            held.append(lock)
+            try:
+                resp = self._client.send(req, stream=True, follow_redirects=allow_redirects)
+            finally:
+                if held:
+                    held.pop().release()
+            headers_received = time.perf_counter_ns()
+            record_phase('ttfb', headers_received - start)
+            try:
+                resp.read()
+            finally:
+                resp.close()
+            record_phase('download', time.perf_counter_ns() - headers_received)
+            return resp
+        except httpx.TooManyRedirects as e:
+            raise TooManyRedirects(str(e))
+        except httpx.TimeoutException as e:
+            raise Timeout(str(e))
+        except ImportError:
+            raise RequestException(INSTALL_HINT)
+        except (httpx.TransportError, httpx.DecodingError) as e:
+            raise ConnectionError(str(e) or type(e).__name__)
@@ -1,25 +1,40 @@
 import json
 import time
 
-import requests
 import difflib
 from collections import namedtuple
 
-import js2py
 from requests import RequestException
 
 from bogi.callbacks import CallbackBase
+from bogi.http2 import Http2Session
+from bogi.json_diff import JsonDiff, describe, text_diff
+from bogi.request_graph import RequestGraph
+from bogi.request_plan import RequestPlan
+from bogi.response_store import ResponseStore, body_digest
 from bogi.response_handler import HttpClient, HttpResponse
+from bogi.script_cache import PythonScriptCache, ScriptCache
+from bogi.timing import start_recording
+from bogi.transport import TransportSession
 
-from bogi.parser.tail_transformer import ContentLine, InputFileRef
 
-TestFailure = namedtuple('TestFailure', ['request', 'error', 'response_time'])
-TestSuccess = namedtuple('TestSuccess', ['request', 'latency', 'response_time'])
-CompareJob = namedtuple('CompareJob', ['req', 'resp', 'request_id'])
+# latency and response_time are in milliseconds, timings are the RequestTimings of the request when it was sent,
+# status_code is None for requests which got no response
+TestFailure = namedtuple('TestFailure', ['request', 'error', 'response_time', 'timings', 'status_code'],
+                         defaults=[None, None])
+TestSuccess = namedtuple('TestSuccess', ['request', 'latency', 'response_time', 'timings', 'status_code'],
+                         defaults=[None, None])
+CompareJob = namedtuple('CompareJob', ['req', 'resp', 'request_id', 'latency', 'response_time', 'timings'])
 
 
 class HttpRunner:
     response_handler_scripts = dict()
+    script_cache = ScriptCache()
+    python_script_cache = PythonScriptCache()
+    # differences reported for a mismatching response body
+    max_differences = 20
+    # send requests without an HTTP version in their request line over HTTP/2
+    http2 = False
 
     def __init__(self, _requests, ignore_headers, base_dir=None, callback=None):
         if callback is None:
@@ -28,154 +43,248 @@ class HttpRunner:
         self._ignore_headers = ignore_headers
         self.callback = callback
         self.base_dir = base_dir
-        self.session = requests.Session()
+        self.session = TransportSession()
+        self._http2_session = None
+        self._responses = ResponseStore(_requests)
+        self._compare_jobs = []
+        self._graph = None
+        self.runtime = None  # seconds it took to run all requests, set by AsyncHttpRunner
 
     def __enter__(self):
         return self
 
     def __exit__(self, *args):
         self.session.close()
+        self._responses.close()
 
     def run(self):
-        resp_by_id = {}
-        compare_jobs = []
+        failed = set()
+        for i, req in enumerate(self._requests):
+            failed_deps = self.graph.requires(i) & failed
+            if failed_deps:
+                self.skip_request(req, failed_deps)
+                failed.add(i)
+            elif not self.run_request(req):
+                failed.add(i)
+
+        self.compare_responses()
+        return self.callback
 
-        for req in self._requests:
-            response_time = -1  # time between sending the request and finishing parsing the entire response
-            latency = -1    # time between sending the request and finishing parsing the response headers
-            try:
-                resp, response_time = self._execute_request(req)
-                latency = resp.elapsed.total_seconds() * 100
-            except RequestException as e:
+    @property
+    def requests(self):
+        return self._requests
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            self._graph = RequestGraph(self._requests, script_loader=self.response_handler_script)
+        return self._graph
+
+    def run_request(self, req):
+        """
+        Sends a single request and checks its response, reporting a single success or failure for it.
+        Returns False if the request failed in a way its dependents can't run, i.e. it couldn't be sent
+        or its status check failed.
+        """
+        recorder = start_recording()
+        try:
+            resp = self._execute_request(req)
+        except RequestException as e:
+            self.callback.failure(TestFailure(request=req,
+                                              response_time=-1,
+                                              timings=recorder.timings(),
+                                              error=f'Error issuing the request, root cause: {str(e)}'))
+            return False
+
+        return self.check_response(req, resp, recorder)
+
+    def check_response(self, req, resp, recorder):
+        # response_time - time between sending the request and finishing reading the entire response
+        # latency - time between sending the request and finishing reading the response headers
+        checks_start = time.perf_counter_ns()
+        response_time = recorder.total_ms
+        latency = recorder.headers_ms
+
+        if req.id:
+            self._responses.put(req.id, resp)
+
+        if req.tail.response_handler:
+            h = req.tail.response_handler
+            if h.expected_status_code and resp.status_code != h.expected_status_code:
                 self.callback.failure(TestFailure(request=req,
-                                                  response_time=-1,
-                                                  error=f'Error issuing the request, root cause: {str(e)}'))
-                continue
-
-            if req.id:
-                resp_by_id[req.id] = resp
-
-            if req.tail.response_handler:
-                h = req.tail.response_handler
-                if h.expected_status_code and resp.status_code != h.expected_status_code:
-                    self.callback.failure(TestFailure(request=req,
-                                                      response_time=response_time,
-                                                      error=f'Expected status code {h.expected_status_code},'
-                                                            f' but got {resp.status_code}'))
-                    break
-
-                # Supporting loading scripts from paths, e.g. `> scripts/my-my-script.js`
-                response_handler_script = None
-                if h.path:
-                    if h.path not in self.response_handler_scripts:
-                        with open(self.base_dir + '/' + h.path, 'r', encoding='utf-8') as file:
-                            self.response_handler_scripts[h.path] = file.read()
-                    response_handler_script = self.response_handler_scripts[h.path]
-                elif h.script:
-                    response_handler_script = h.script
-
-                if response_handler_script:
-                    # Response handler script should be written in JavaScript ECMAScript 5.1 specification.
-                    # See examples in
-                    # https://www.jetbrains.com/help/webstorm/http-response-handling-examples.html#script-var-example
-                    # TODO support a python variant
-                    context = js2py.EvalJs(
-                        {
-                            'client': HttpClient(),
-                            'response': HttpResponse(resp),
-                        }
-                    )
-
-                    try:
-                        context.execute(response_handler_script)
-                    except js2py.internals.simplex.JsException as e:
-                        self.callback.failure(TestFailure(request=req,
-                                                          response_time=response_time,
-                                                          error=str(e).replace('Error: your Python function failed!  ', '')))
-
-            if req.tail.response_ref:
-                compare_jobs.append(CompareJob(req=req,
-                                               resp=resp,
-                                               request_id=req.tail.response_ref.path))
-
-            self.callback.success(TestSuccess(request=req, latency=latency, response_time=response_time))
-
-        for job in compare_jobs:
-            cmp_resp = resp_by_id.get(job.request_id)
-            if cmp_resp is None:
-                req_ids = list(resp_by_id.keys())
-                error = 'Request with id "{}" not found. Defined requests: {}'.format(job.request_id, req_ids)
-                self.callback.failure(TestFailure(request=job.req,
-                                                  response_time=job.resp.elapsed.total_seconds() * 100,
-                                                  error=error))
-                continue
-
-            diff = self._diff_responses(job.resp, cmp_resp)
-            if diff:
-                self.callback.failure(TestFailure(request=job.req, response_time=job.resp.elapsed.total_seconds() * 100,
-                                                  error=diff))
+                                                  response_time=response_time,
+                                                  timings=self._timings(recorder, checks_start),
+                                                  status_code=resp.status_code,
+                                                  error=f'Expected status code {h.expected_status_code},'
+                                                        f' but got {resp.status_code}'))
+                return False
+
+            response_handler_script = self.response_handler_script(req)
+            if response_handler_script:
+                start = time.perf_counter_ns()
+                error = self._run_response_handler(h, response_handler_script, resp)
+                self.callback.handler_time(h.language, (time.perf_counter_ns() - start) / 1e9)
+                if error:
+                    self.callback.failure(TestFailure(request=req, response_time=response_time,
+                                                      timings=self._timings(recorder, checks_start),
+                                                      status_code=resp.status_code, error=error))
+                    # the response was there, dependents can still run
+                    return True
+
+        if req.tail.response_ref:
+            job = CompareJob(req=req, resp=resp, request_id=req.tail.response_ref.path, latency=latency,
+                             response_time=response_time, timings=self._timings(recorder, checks_start))
+            # referenced requests which already ran are compared right away, others once the file is done,
+            # the check succeeds or fails once compared
+            if job.request_id in self._responses:
+                self._compare(job)
+            else:
+                self._compare_jobs.append(job)
+            return True
+
+        self.callback.success(TestSuccess(request=req, latency=latency, response_time=response_time,
+                                          timings=self._timings(recorder, checks_start),
+                                          status_code=resp.status_code))
+        return True
+
+    def _timings(self, recorder, checks_start):
+        return recorder.timings()._replace(handler=(time.perf_counter_ns() - checks_start) / 1e6)
+
+    def skip_request(self, req, failed_indexes):
+        failed = ', '.join(['#{}'.format(i + 1) for i in sorted(failed_indexes)])
+        self.callback.failure(TestFailure(request=req,
+                                          response_time=-1,
+                                          error=f'Skipped, depends on failed request {failed}'))
+
+    def _run_response_handler(self, h, script, resp):
+        """
+        Runs a response handler script, returning the error it raised if any.
+        """
+        variables = {
+            'client': HttpClient(),
+            'response': HttpResponse(resp),
+        }
+        if h.language == 'python':
+            try:
+                self.python_script_cache.execute(script, variables, filename=h.path or '<response handler>')
+            except Exception as e:
+                return str(e) or type(e).__name__
+            return None
 
-        return self.callback
+        import js2py
 
-    def _execute_request(self, req):
-        headers = {
-            header.field: header.value
-            for header in req.headers
-        }
-        data = self._request_payload(req)
+        # JavaScript handlers should be written in ECMAScript 5.1.
+        # See examples in
+        # https://www.jetbrains.com/help/webstorm/http-response-handling-examples.html#script-var-example
+        try:
+            self.script_cache.execute(script, variables)
+        except js2py.internals.simplex.JsException as e:
+            return str(e).replace('Error: your Python function failed!  ', '')
+        return None
 
-        allow_redirects = True
-        if '@no-redirect' in req.options:
-            allow_redirects = False
+    def response_handler_script(self, req):
+        h = req.tail.response_handler
+        if h is None:
+            return None
 
-        no_cookie_jar = False
-        if '@no-cookie-jar' in req.options:
-            no_cookie_jar = True
+        # Supporting loading scripts from paths, e.g. `> scripts/my-my-script.js` or `> scripts/my-script.py`
+        if h.path:
+            if h.path not in self.response_handler_scripts:
+                with open(self.base_dir + '/' + h.path, 'r', encoding='utf-8') as file:
+                    self.response_handler_scripts[h.path] = file.read()
+            return self.response_handler_scripts[h.path]
+        return h.script
+
+    def compare_responses(self):
+        for job in self._compare_jobs:
+            self._compare(job)
+        self._compare_jobs = []
+
+    def _compare(self, job):
+        cmp_resp = self._responses.get(job.request_id)
+        if cmp_resp is None:
+            req_ids = list(self._responses.ids)
+            error = 'Request with id "{}" not found. Defined requests: {}'.format(job.request_id, req_ids)
+            self.callback.failure(TestFailure(request=job.req, response_time=job.response_time, timings=job.timings,
+                                              status_code=job.resp.status_code, error=error))
+            return
 
-        if no_cookie_jar:
-            start = time.time()
-            resp = requests.request(req.method, req.target, headers=headers, data=data,
-                                    allow_redirects=allow_redirects)
+        try:
+            diff = self._diff_responses(job.resp, cmp_resp, ignore=self._ignored_paths(job.req))
+        except ValueError as e:
+            diff = str(e)
+        finally:
+            self._responses.release(job.request_id)
+        if diff:
+            self.callback.failure(TestFailure(request=job.req, response_time=job.response_time, timings=job.timings,
+                                              status_code=job.resp.status_code, error=diff))
         else:
-            start = time.time()
-            resp = self.session.request(req.method, req.target, headers=headers, data=data,
-                                        allow_redirects=allow_redirects)
-        return resp, (time.time() - start) * 100
-
-    def _diff_responses(self, resp1, resp2):
-        if resp1.status_code != resp2.status_code:
-            return "Status code mismatch. {} != {}".format(resp1.status_code, resp2.status_code)
-
-        if not self._ignore_headers and resp1.headers != resp2.headers:
-            headers1 = self._headers_to_list(resp1.headers)
-            headers2 = self._headers_to_list(resp2.headers)
+            self.callback.success(TestSuccess(request=job.req, latency=job.latency, response_time=job.response_time,
+                                              timings=job.timings, status_code=job.resp.status_code))
+
+    def _execute_request(self, req):
+        if req.plan is None:
+            req.plan = RequestPlan.compile(req)
+        plan = req.plan
+
+        if plan.http2 or (plan.http2 is None and self.http2):
+            if not plan.cookie_jar:
+                session = Http2Session()
+            else:
+                if self._http2_session is None:
+                    self._http2_session = Http2Session()
+                session = self._http2_session
+            return session.request(plan.method, plan.url, headers=plan.headers, data=plan.body(),
+                                   allow_redirects=plan.allow_redirects)
+
+        if not plan.cookie_jar:
+            # a cookie jar of its own, like requests.request() would use, on the shared connections
+            return TransportSession().request(plan.method, plan.url, headers=plan.headers, data=plan.body(),
+                                              allow_redirects=plan.allow_redirects)
+        return self.session.request(plan.method, plan.url, headers=plan.headers, data=plan.body(),
+                                    allow_redirects=plan.allow_redirects)
+
+    def _diff_responses(self, resp, stored, ignore=()):
+        """
+        Compares a response to a StoredResponse. Bodies are compared by digest first, and only parsed if they differ,
+        JSON bodies are then diffed by path, leaving out `ignore` paths, other bodies line by line.
+        """
+        if resp.status_code != stored.status_code:
+            return "Status code mismatch. {} != {}".format(resp.status_code, stored.status_code)
+
+        if not self._ignore_headers and resp.headers != stored.headers:
+            headers1 = self._headers_to_list(resp.headers)
+            headers2 = self._headers_to_list(stored.headers)
             diff = ''.join(difflib.ndiff(headers1, headers2))
             return "Response headers mismatch.\n{}".format(diff)
 
-        try:
-            json1, json2 = resp1.json(), resp2.json()
-            if json1 != json2:
-                return "Response body mismatch."
-        except (json.decoder.JSONDecodeError, UnicodeDecodeError, TypeError) as e:
-            if resp1.text != resp2.text:
-                return "Response body mismatch. Encountered error while comparing: %s" % e
-
-        return None
-
-    def _request_payload(self, req):
-        if req.tail.message_body is None:
+        content = resp.content or b''
+        if len(content) == stored.size and body_digest(content) == stored.digest:
             return None
 
-        encoding = req.charset or 'utf-8'
-        res = []
+        # same JSON documents can still differ in formatting or key order
+        stored_content = self._responses.content(stored)
+        try:
+            json1, json2 = json.loads(content), json.loads(stored_content)
+        except (json.decoder.JSONDecodeError, UnicodeDecodeError, TypeError):
+            diff = text_diff(content.decode('utf-8', errors='replace'),
+                             stored_content.decode('utf-8', errors='replace'),
+                             limit=self.max_differences)
+            return "Response body mismatch.\n{}".format(diff)
+
+        differences, truncated = JsonDiff(ignore=ignore, limit=self.max_differences).diff(json1, json2)
+        if differences:
+            return "Response body mismatch.\n{}".format(describe(differences, truncated))
+        return None
 
-        for part in req.tail.message_body.messages:
-            if type(part) is ContentLine:
-                res.append(part.content)
-            elif type(part) is InputFileRef:
-                with open(part.path, 'r', encoding=encoding) as f:
-                    res.append(f.read())
-        return ''.join(res)
+    def _ignored_paths(self, req):
+        # `// @ignore $.path ...`, paths are separated by spaces or commas
+        paths = []
+        for option in req.options:
+            name, _, value = option.partition(' ')
+            if name == '@ignore':
+                paths += value.replace(',', ' ').split()
+        return paths
 
     def _headers_to_list(self, headers):
         return [key + ': ' + val + '\n' for key, val in headers.items()]
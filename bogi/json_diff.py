@@ -0,0 +1,200 @@
+import difflib
+import json
+import marshal
+import re
+from collections import namedtuple
+
+# kind is 'changed', 'type', 'added' (only in the left document) or 'removed' (only in the right one)
+Difference = namedtuple('Difference', ['path', 'kind', 'left', 'right'])
+
+PATH_SEGMENT_RE = re.compile(r"\.([^.\[\]]+)|\[(\d+|\*)\]|\['([^']*)'\]")
+IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_-]*$')
+
+WILDCARD = object()
+
+
+def parse_path(path):
+    """
+    Segments of a JSON path like `$.items[0].id` or `$.items[*]['created at']`, `*` matching any key or index.
+    """
+    path = path.strip()
+    if not path.startswith('$'):
+        raise ValueError(f'Invalid JSON path "{path}", it should start with $')
+    segments = []
+    pos = 1
+    while pos < len(path):
+        m = PATH_SEGMENT_RE.match(path, pos)
+        if not m:
+            raise ValueError(f'Invalid JSON path "{path}"')
+        name, index, quoted = m.groups()
+        if name == '*' or index == '*':
+            segments.append(WILDCARD)
+        elif index is not None:
+            segments.append(int(index))
+        else:
+            segments.append(quoted if quoted is not None else name)
+        pos = m.end()
+    return tuple(segments)
+
+
+def format_path(segments):
+    res = ['$']
+    for s in segments:
+        if type(s) is int:
+            res.append(f'[{s}]')
+        elif IDENTIFIER_RE.match(s):
+            res.append('.' + s)
+        else:
+            res.append("['{}']".format(s.replace("'", "\\'")))
+    return ''.join(res)
+
+
+class JsonDiff:
+    """
+    Differences between two JSON documents, found in a single walk over both, stopping after `limit` of them.
+    Subtrees are compared in C first, and only walked into when they differ, so finding a few differences in
+    a large document costs a fraction of walking it. Values of another JSON type differ even when Python takes
+    them as equal, like `true` and `1`. Paths matching one of `ignore` aren't compared.
+    """
+
+    def __init__(self, ignore=(), limit=20):
+        self.ignore = [parse_path(p) if type(p) is str else p for p in ignore]
+        if () in self.ignore:
+            raise ValueError('Ignoring $ would ignore the whole document')
+        self.limit = limit
+
+    def diff(self, left, right):
+        """
+        Differences as a list of Difference, and whether there were more than `limit` of them.
+        """
+        differences = []
+        if _same(left, right):
+            return differences, False
+
+        # (path, left, right, ignore patterns relative to the path) still to compare, depth first in document order
+        stack = [((), left, right, self.ignore)]
+        while stack:
+            path, a, b, patterns = stack.pop()
+
+            if type(a) is dict and type(b) is dict:
+                keys = [k for k in a if k in b]
+                added = [k for k in a if k not in b]
+                removed = [k for k in b if k not in a]
+            elif type(a) is list and type(b) is list:
+                n = min(len(a), len(b))
+                keys = range(n)
+                added, removed = range(n, len(a)), range(n, len(b))
+            else:
+                if _json_type(a) != _json_type(b):
+                    differences.append(Difference(format_path(path), 'type', a, b))
+                elif not _same(a, b):
+                    # numbers written differently, like 1 and 1.0
+                    differences.append(Difference(format_path(path), 'changed', a, b))
+                if len(differences) > self.limit:
+                    return differences[:self.limit], True
+                continue
+
+            if not patterns:
+                # nothing ignored below, equal children are skipped without walking them
+                for k in added:
+                    differences.append(Difference(format_path(path + (k,)), 'added', a[k], None))
+                for k in removed:
+                    differences.append(Difference(format_path(path + (k,)), 'removed', None, b[k]))
+                stack.extend((path + (k,), a[k], b[k], patterns) for k in reversed(keys) if not _same(a[k], b[k]))
+            else:
+                for k in added:
+                    if _child_patterns(patterns, k) is not None:
+                        differences.append(Difference(format_path(path + (k,)), 'added', a[k], None))
+                for k in removed:
+                    if _child_patterns(patterns, k) is not None:
+                        differences.append(Difference(format_path(path + (k,)), 'removed', None, b[k]))
+                children = []
+                for k in keys:
+                    if not _same(a[k], b[k]):
+                        child = _child_patterns(patterns, k)
+                        if child is not None:
+                            children.append((path + (k,), a[k], b[k], child))
+                stack.extend(reversed(children))
+
+            if len(differences) > self.limit:
+                return differences[:self.limit], True
+        return differences, False
+
+
+def _child_patterns(patterns, key):
+    """
+    Ignore patterns relative to the child `key`, None if the child itself is ignored.
+    """
+    res = []
+    for p in patterns:
+        if p[0] is WILDCARD or p[0] == key:
+            if len(p) == 1:
+                return None
+            res.append(p[1:])
+    return res
+
+
+def _same(a, b):
+    """
+    Whether two JSON values are equal with the same types, == alone takes `true` for `1` and `1` for `1.0`.
+    """
+    if a != b:
+        return False
+    if type(a) is dict or type(a) is list:
+        # equal containers may still hold values of other types, marshal tells them apart in C. Encodings also
+        # differ for keys in another order, those containers are walked into and found equal there
+        return marshal.dumps(a) == marshal.dumps(b)
+    return type(a) is type(b)
+
+
+def _json_type(value):
+    if type(value) is bool or value is None:
+        return type(value)
+    if type(value) in (int, float):
+        return float
+    return type(value)
+
+
+def describe(differences, truncated, left_name='response', right_name='referenced response'):
+    lines = []
+    for d in differences:
+        if d.kind == 'added':
+            lines.append(f'{d.path}: only in {left_name}: {_short(d.left)}')
+        elif d.kind == 'removed':
+            lines.append(f'{d.path}: only in {right_name}: {_short(d.right)}')
+        else:
+            lines.append(f'{d.path}: {_short(d.left)} != {_short(d.right)}')
+    if truncated:
+        lines.append(f'... stopped after {len(differences)} differences')
+    return '\n'.join(lines)
+
+
+def text_diff(left, right, limit=20):
+    """
+    ndiff of the lines of two texts, leaving out their common first and last lines and stopping after `limit`
+    changed lines.
+    """
+    a, b = left.splitlines(keepends=True), right.splitlines(keepends=True)
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+
+    lines = []
+    for line in difflib.ndiff(a, b):
+        if line.startswith('  '):
+            continue
+        if len(lines) == limit:
+            lines.append(f'... stopped after {limit} lines\n')
+            break
+        lines.append(line if line.endswith('\n') else line + '\n')
+    header = f'@@ from line {start + 1} @@\n' if start else ''
+    return header + ''.join(lines)
+
+
+def _short(value, width=80):
+    s = json.dumps(value, ensure_ascii=False)
+    return s if len(s) <= width else s[:width - 3] + '...'
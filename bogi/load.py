@@ -0,0 +1,181 @@
+import copy
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from bogi import bcolors
+from bogi.callbacks import CallbackBase
+from bogi.histogram import PERCENTILES, LatencyHistogram, LatencyHistograms
+from bogi.http_runner import HttpRunner, TestFailure
+
+
+class LoadCallback(CallbackBase):
+    """
+    Counts errors, without keeping checks, so memory doesn't grow with the number of requests.
+    """
+    keep_successes = False
+
+    def __init__(self):
+        super(LoadCallback, self).__init__()
+        self.errors = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def thread_failures(self):
+        """
+        Failures reported from the current thread, which sends a single request at a time.
+        """
+        return getattr(self._local, 'failures', 0)
+
+    def failure(self, f):
+        self._local.failures = self.thread_failures + 1
+        with self._lock:
+            self.errors[f.error] += 1
+
+    def handler_time(self, language, seconds):
+        pass
+
+
+class LoadGenerator:
+    """
+    Sends the requests of parsed .http files as load, through HttpRunner so they're built and checked like in
+    a regular run, for `duration` seconds.
+
+    With `rate`, requests arrive at a constant rate whether or not earlier ones completed (open model), going
+    round robin over every request of every file. A request's latency is measured from when it was due to be
+    sent, so time spent queued behind slow requests counts, rather than being omitted.
+    With `users`, each virtual user runs the files' requests in order, sending the next as soon as the previous
+    completed (closed model). As a stalled user sends nothing, stalls are corrected for by also recording
+    the samples a user sending every median latency would have seen.
+    Responses are checked against `>STATUS` and response handlers, `<>` references aren't compared.
+    """
+
+    def __init__(self, files, base_dir, duration, rate=None, users=None, max_in_flight=256):
+        if (rate is None) == (users is None):
+            raise ValueError('Either a rate or a number of users is required')
+        self.files = [(path, [_without_reference(req) for req in reqs]) for path, reqs in files]
+        self.base_dir = base_dir
+        self.duration = duration
+        self.rate = rate
+        self.users = users
+        self.max_in_flight = max_in_flight
+        self.callback = LoadCallback()
+        self.latencies = LatencyHistograms()
+        self.latency = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+        self.sent = 0
+        self.failed = 0
+        self.elapsed = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._runners = []
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            if self.rate is not None:
+                self._run_open(start)
+            else:
+                self._run_closed(start)
+        finally:
+            for runner in self._runners:
+                runner.session.close()
+        self.elapsed = time.perf_counter() - start
+        return self
+
+    @property
+    def throughput(self):
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def error_rate(self):
+        return self.failed / self.sent if self.sent else 0.0
+
+    def summary(self):
+        def ms(value):
+            return '-' if value is None else f'{value:.1f}ms'
+
+        lines = [
+            f'{bcolors.BOLD}{self.sent} requests in {self.elapsed:.1f}s, '
+            f'{self.throughput:.1f} requests/s, {self.error_rate:.2%} errors{bcolors.ENDC}',
+            'latency      ' + ' '.join(f'p{p}: {ms(self.latency.percentile(p))}' for p in PERCENTILES)
+            + f' max: {ms(self.latency.max)}',
+            'service time ' + ' '.join(f'p{p}: {ms(self.service_time.percentile(p))}' for p in PERCENTILES)
+            + f' max: {ms(self.service_time.max)}',
+            self.latencies.table(),
+        ]
+        for error, count in self.callback.errors.most_common(10):
+            lines.append(f'{bcolors.FAIL}{count} x {error}{bcolors.ENDC}')
+        return '\n'.join(lines)
+
+    def _runner(self):
+        runner = getattr(self._local, 'runner', None)
+        if runner is None:
+            runner = HttpRunner([], ignore_headers=True, base_dir=self.base_dir, callback=self.callback)
+            self._local.runner = runner
+            with self._lock:
+                self._runners.append(runner)
+        return runner
+
+    def _run_open(self, start):
+        requests = [req for _, reqs in self.files for req in reqs]
+        interval = 1 / self.rate
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            i = 0
+            while True:
+                # compared before adding start, which would round the offset
+                if i * interval >= self.duration:
+                    break
+                due = start + i * interval
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._send, requests[i % len(requests)], due)
+                i += 1
+
+    def _run_closed(self, start):
+        def user():
+            while time.perf_counter() - start < self.duration:
+                for _, reqs in self.files:
+                    for req in reqs:
+                        if time.perf_counter() - start >= self.duration:
+                            return
+                        self._send(req, time.perf_counter(), corrected=True)
+
+        threads = [threading.Thread(target=user, name=f'bogi-user-{n}') for n in range(self.users)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def _send(self, req, due, corrected=False):
+        sent = time.perf_counter()
+        failures = self.callback.thread_failures
+        try:
+            self._runner().run_request(req)
+        except Exception as e:
+            # the executor would swallow it
+            self.callback.failure(TestFailure(request=req, error=f'{type(e).__name__}: {e}', response_time=-1))
+        done = time.perf_counter()
+        latency, service_time = (done - due) * 1000, (done - sent) * 1000
+        # response handler failures are reported without failing run_request, so count them from the callback
+        failed = self.callback.thread_failures > failures
+        with self._lock:
+            self.sent += 1
+            self.failed += failed
+            self.service_time.record(service_time)
+            if corrected:
+                self.latency.record_corrected(latency, self.service_time.percentile(50))
+            else:
+                self.latency.record(latency)
+            self.latencies.record(req, latency, failed=failed)
+
+
+def _without_reference(req):
+    if req.tail is None or req.tail.response_ref is None:
+        return req
+    req = copy.copy(req)
+    req.tail = req.tail._replace(response_ref=None)
+    return req
@@ -0,0 +1,151 @@
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bogi.concurrency import Recorder
+
+# upper bounds, in seconds, of the response time histogram buckets
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestMetrics(Recorder):
+    """
+    Check counts and response time histograms of a single file, by request ID, method and status code.
+    The request ID is the target URL for requests without one, and the status code is empty for requests
+    which got no response.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.checks = Counter()
+        self.buckets = Counter()
+        self.sums = Counter()
+        self.counts = Counter()
+
+    def record(self, check, success):
+        req = check.request
+        labels = (req.id or req.target, req.method, str(check.status_code or ''))
+        with self._lock:
+            self.checks[labels + ('success' if success else 'failure',)] += 1
+            if check.response_time is not None and check.response_time >= 0:
+                seconds = check.response_time / 1000
+                for le in BUCKETS:
+                    if seconds <= le:
+                        self.buckets[labels + (le,)] += 1
+                self.sums[labels] += seconds
+                self.counts[labels] += 1
+
+
+class MetricsRegistry:
+    """
+    Metrics of every file run so far, rendered in the Prometheus text format.
+    Files are merged in as they finish, scraping only holds the lock to copy the counters.
+    """
+
+    def __init__(self):
+        self._checks = Counter()
+        self._buckets = Counter()
+        self._sums = Counter()
+        self._counts = Counter()
+        self._file_runs = Counter()
+        self._file_runtimes = {}
+        self._lock = threading.Lock()
+
+    def merge(self, path, metrics, runtime=None):
+        f = os.path.basename(path)
+        with self._lock:
+            self._file_runs[f] += 1
+            if runtime is not None:
+                self._file_runtimes[f] = runtime
+            if metrics is None:
+                return
+            with metrics._lock:
+                for counter, own in ((metrics.checks, self._checks), (metrics.buckets, self._buckets),
+                                     (metrics.sums, self._sums), (metrics.counts, self._counts)):
+                    for labels, value in counter.items():
+                        own[(f,) + labels] += value
+
+    def render(self):
+        with self._lock:
+            checks, buckets = dict(self._checks), dict(self._buckets)
+            sums, counts = dict(self._sums), dict(self._counts)
+            file_runs, file_runtimes = dict(self._file_runs), dict(self._file_runtimes)
+
+        lines = [
+            '# HELP bogi_checks_total Checks run, by outcome.',
+            '# TYPE bogi_checks_total counter',
+        ]
+        for (f, request_id, method, status, result), value in sorted(checks.items()):
+            lines.append(_sample('bogi_checks_total', value, file=f, request_id=request_id, method=method,
+                                 status_code=status, result=result))
+
+        lines += [
+            '# HELP bogi_response_time_seconds Time from sending a request to reading its response.',
+            '# TYPE bogi_response_time_seconds histogram',
+        ]
+        for labels in sorted(counts):
+            f, request_id, method, status = labels
+            names = dict(file=f, request_id=request_id, method=method, status_code=status)
+            for le in BUCKETS:
+                lines.append(_sample('bogi_response_time_seconds_bucket', buckets.get(labels + (le,), 0),
+                                     **names, le=repr(le)))
+            lines.append(_sample('bogi_response_time_seconds_bucket', counts[labels], **names, le='+Inf'))
+            lines.append(_sample('bogi_response_time_seconds_sum', sums[labels], **names))
+            lines.append(_sample('bogi_response_time_seconds_count', counts[labels], **names))
+
+        lines += [
+            '# HELP bogi_file_runs_total Times each file was run.',
+            '# TYPE bogi_file_runs_total counter',
+        ]
+        lines += [_sample('bogi_file_runs_total', v, file=f) for f, v in sorted(file_runs.items())]
+        lines += [
+            '# HELP bogi_file_runtime_seconds How long the last run of each file took.',
+            '# TYPE bogi_file_runtime_seconds gauge',
+        ]
+        lines += [_sample('bogi_file_runtime_seconds', v, file=f) for f, v in sorted(file_runtimes.items())]
+        return '\n'.join(lines) + '\n'
+
+
+def _sample(name, value, **labels):
+    label_str = ','.join('{}="{}"'.format(k, _escape(v)) for k, v in labels.items())
+    return f'{name}{{{label_str}}} {value}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class MetricsServer:
+    """
+    Serves a MetricsRegistry at /metrics from a background thread.
+    """
+
+    def __init__(self, registry, port, host='0.0.0.0'):
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name='bogi-metrics', daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,93 @@
+import glob
+import hashlib
+import os
+import pickle
+from collections import namedtuple
+from functools import lru_cache
+
+from lark import __version__ as lark_version
+
+from bogi.parser.main import Parser
+
+CachedFile = namedtuple('CachedFile', ['mtime', 'size', 'digest', 'requests'])
+
+
+@lru_cache(maxsize=None)
+def _parser_version():
+    """
+    Hash of everything requests are parsed with: the grammars, the parser modules and Lark's version.
+    Changing any of them invalidates the requests cached on disk.
+    """
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    paths = sorted(glob.glob(os.path.join(dir_path, '../grammar/*.lark')) + glob.glob(os.path.join(dir_path, '*.py')))
+    md5 = hashlib.md5(lark_version.encode('utf-8'))
+    for path in paths:
+        with open(path, 'rb') as f:
+            md5.update(f.read())
+    return md5.hexdigest()
+
+
+class ParsedFileCache:
+    """
+    Requests parsed from .http files, kept in memory by path and, when `directory` is set, pickled to disk by
+    content hash so later runs skip parsing files which didn't change.
+    Files are read again only when their mtime or size changed, and parsed again only when their content did.
+    """
+    directory = None
+
+    def __init__(self):
+        # (path, parser) -> CachedFile
+        self._files = {}
+        self.parsed = 0
+
+    def parse(self, path, parser='earley'):
+        """
+        The requests of the .http file at `path`, raising what the parser raises.
+        """
+        stat = os.stat(path)
+        cached = self._files.get((path, parser))
+        if cached and (cached.mtime, cached.size) == (stat.st_mtime_ns, stat.st_size):
+            return cached.requests
+
+        with open(path, 'r') as f:
+            code = f.read()
+        key = '\n'.join([parser, _parser_version(), code])
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        if cached and cached.digest == digest:
+            requests = cached.requests
+        else:
+            requests = self._load(digest)
+            if requests is None:
+                requests = Parser(parser=parser).parse(code)
+                self.parsed += 1
+                self._save(digest, requests)
+
+        self._files[(path, parser)] = CachedFile(mtime=stat.st_mtime_ns, size=stat.st_size, digest=digest,
+                                                 requests=requests)
+        return requests
+
+    def clear(self):
+        self._files.clear()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest + '.pickle')
+
+    def _load(self, digest):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(digest), 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # not cached yet, or truncated or written by an incompatible version, parsed and saved again
+            return None
+
+    def _save(self, digest, requests):
+        if not self.directory:
+            return
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(requests, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
@@ -1,25 +1,31 @@
-from lark import Lark
-
 from bogi.parser.main_transformer import MainTransformer
 from bogi.parser.tail_transformer import RequestTail
 from bogi.parser.tail import TailParser
-from bogi.parser.util import load_grammar
+from bogi.parser.util import load_grammar, build_lark, grammar_parts
 
 
 class Parser:
+    # Lark parsers by parser type shared by all instances, grammar analysis happens once per process
+    _lark_by_parser = dict()
 
-    def __init__(self):
-        self._grammar = load_grammar(['main', 'shared'])
+    def __init__(self, parser='earley'):
+        self._parser = parser
 
     def parse(self, code):
-        parser = Lark(self._grammar, start='requests_file', keep_all_tokens=True)
-        tree = parser.parse(code + '\n')
+        tree = self._get_lark().parse(code + '\n')
         requests = MainTransformer().transform(tree)
 
         for r in requests:
             if r.tail is None:
                 r.tail = RequestTail(message_body=None, response_handler=None, response_ref=None)
             else:
-                r.tail = TailParser(r.multipart_boundary).parse(r.tail)
+                r.tail = TailParser(r.multipart_boundary, parser=self._parser).parse(r.tail)
 
         return requests
+
+    def _get_lark(self):
+        if self._parser not in self._lark_by_parser:
+            grammar = load_grammar(grammar_parts('main', self._parser))
+            self._lark_by_parser[self._parser] = build_lark(grammar, start='requests_file', parser=self._parser,
+                                                            keep_all_tokens=True)
+        return self._lark_by_parser[self._parser]
@@ -1,3 +1,4 @@
+import re
 from collections import namedtuple
 from urllib.parse import urljoin
 
@@ -8,6 +9,9 @@ from bogi.parser.util import BaseTransformer, HeaderList
 RequestLine = namedtuple('RequestLine', ['method', 'target', 'http_version'])
 RequestSeparator = namedtuple('RequestSeparator', ['comment'])
 
+# `HTTP/2` at the end of a request line, parsed as part of its target
+HTTP_VERSION_RE = re.compile(r'\s+HTTP/(\d+(?:\.\d+)?)\s*$')
+
 
 class Request:
     def __init__(self, request_line, headers=None, separators=None, options=None, tail=None):
@@ -18,6 +22,9 @@ class Request:
         self.headers = headers or []
         self.options = options
         self.tail = tail
+        self._target = None
+        # RequestPlan, compiled when the request is first sent
+        self.plan = None
 
     @property
     def id(self):
@@ -31,14 +38,17 @@ class Request:
 
     @property
     def http_version(self):
-        return self.request_line.method
+        return self.request_line.http_version
 
     @property
     def target(self):
-        host_headers = [h for h in self.headers if h.field.lower() == 'host']
-        if not host_headers:
-            return self.request_line.target
-        return urljoin(host_headers[0].value, self.request_line.target)
+        if self._target is None:
+            host_headers = [h for h in self.headers if h.field.lower() == 'host']
+            if not host_headers:
+                self._target = self.request_line.target
+            else:
+                self._target = urljoin(host_headers[0].value, self.request_line.target)
+        return self._target
 
     @property
     def charset(self):
@@ -53,9 +63,9 @@ class Request:
         for h in headers:
             parts = h.value.split(';')
             for p in parts:
-                p = p.split('=')
-                if p[0].lower() == param:
-                    return p[1]
+                p = p.split('=', 1)
+                if p[0].strip().lower() == param:
+                    return p[1].strip()
 
     def __repr__(self):
         parts = (
@@ -116,7 +126,19 @@ class MainTransformer(BaseTransformer):
                     method = str(p.children[0])
                 elif p.data == 'request_target':
                     target = self._join_parts(p.children)
-        return RequestLine(method=method, target=target, http_version=None)
+        http_version = None
+        m = HTTP_VERSION_RE.search(target)
+        if m:
+            target, http_version = target[:m.start()], m.group(1)
+        return RequestLine(method=method, target=target, http_version=http_version)
+
+    def query(self, parts):
+        # whitespace is removed from queries, except before the HTTP version
+        query = self._join_parts(parts)
+        m = HTTP_VERSION_RE.search(query)
+        if m:
+            return self._join_replace_whitespace([query[:m.start()]]) + ' HTTP/' + m.group(1)
+        return self._join_replace_whitespace([query])
 
     def _flatten(self, x):
         if isinstance(x, list):
@@ -128,7 +150,9 @@ class MainTransformer(BaseTransformer):
     origin_form = BaseTransformer._join_parts
     path_separator = BaseTransformer._join_parts
     absolute_path = BaseTransformer._join_parts
-    query = BaseTransformer._join_replace_whitespace
     fragment = BaseTransformer._join_replace_whitespace
     newline_with_indent = BaseTransformer._none
+    path_continuation = BaseTransformer._none
+    query_continuation = BaseTransformer._none
+    fragment_continuation = BaseTransformer._none
     request_with_separator = BaseTransformer._filter_none
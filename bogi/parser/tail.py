@@ -1,28 +1,41 @@
-from lark import Lark
-
 from bogi.parser.tail_transformer import TailTransformer
-from bogi.parser.util import load_grammar
+from bogi.parser.util import load_grammar, build_lark, grammar_parts
 
 
 class TailParser:
+    # Lark parsers by parser type and multipart boundary, the boundary is baked into the generated grammar
+    _lark_by_boundary = dict()
+
+    def __init__(self, multipart_boundary=None, parser='earley'):
+        self._multipart_boundary = multipart_boundary
+        self._parser = parser
+
+    def parse(self, code):
+        if self._parser == 'lalr':
+            # LALR grammar expects every line to be terminated
+            code += '\n'
+        tree = self._get_lark().parse(code)
+        return TailTransformer().transform(tree)
 
-    def __init__(self, multipart_boundary=None):
-        self._grammar = load_grammar(['request_tail', 'shared'])
+    def _get_lark(self):
+        key = (self._parser, self._multipart_boundary)
+        if key not in self._lark_by_boundary:
+            self._lark_by_boundary[key] = build_lark(self._build_grammar(), start='request_tail', parser=self._parser,
+                                                     keep_all_tokens=True)
+        return self._lark_by_boundary[key]
+
+    def _build_grammar(self):
+        grammar = load_grammar(grammar_parts('request_tail', self._parser))
         content_line_token = 'CONTENT_LINE: /(?!(###|< |> |<> {}))[^\\n\\r]+/'
 
         generated = []
 
-        if multipart_boundary:
-            generated.append('BOUNDARY: "{}"'.format(multipart_boundary))
-            generated.append(content_line_token.format('|--' + multipart_boundary))
-        else:            
+        if self._multipart_boundary:
+            generated.append('BOUNDARY: "{}"'.format(self._multipart_boundary))
+            generated.append(content_line_token.format('|--' + self._multipart_boundary))
+        else:
             # add dummy token which matches nothing
             generated.append('BOUNDARY: /(?=a)b/')
             generated.append(content_line_token.format(''))
 
-        self._grammar = self._grammar + '\n' + '\n'.join(generated)
-
-    def parse(self, code):
-        parser = Lark(self._grammar, start='request_tail', keep_all_tokens=True)
-        tree = parser.parse(code)
-        return TailTransformer().transform(tree)
+        return grammar + '\n' + '\n'.join(generated)
@@ -1,3 +1,4 @@
+import textwrap
 from collections import namedtuple
 
 from lark import Tree, Token
@@ -9,7 +10,9 @@ MessageBody = namedtuple('MessageBody', ['messages'])
 ContentLine = namedtuple('ContentLine', ['content'])
 InputFileRef = namedtuple('InputFileRef', ['path'])
 MultipartField = namedtuple('MultipartField', ['headers', 'messages'])
-ResponseHandler = namedtuple('ResponseHandler', ['script', 'path', 'expected_status_code'])
+# language is 'python' for `{% python ... %}` scripts and .py files, 'javascript' otherwise
+ResponseHandler = namedtuple('ResponseHandler', ['script', 'path', 'expected_status_code', 'language'],
+                             defaults=['javascript'])
 ResponseReference = namedtuple('ResponseReference', ['path'])
 
 
@@ -79,10 +82,17 @@ class TailTransformer(BaseTransformer):
     def response_handler(self, parts):
         for p in parts:
             if type(p) is Token and p.type == 'HANDLER_SCRIPT':
-                return ResponseHandler(script=str(p).strip(), path=None, expected_status_code=None)
+                script = str(p).strip()
+                first_line, _, rest = script.partition('\n')
+                if first_line.strip() == 'python':
+                    return ResponseHandler(script=textwrap.dedent(rest).strip(), path=None,
+                                           expected_status_code=None, language='python')
+                return ResponseHandler(script=script, path=None, expected_status_code=None)
 
             elif type(p) is Tree and p.data == 'file_path':
-                return ResponseHandler(script=None, path=self._join_parts(p.children), expected_status_code=None)
+                path = self._join_parts(p.children)
+                language = 'python' if path.strip().endswith('.py') else 'javascript'
+                return ResponseHandler(script=None, path=path, expected_status_code=None, language=language)
 
     def response_ref(self, parts):
         for p in parts:
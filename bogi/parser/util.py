@@ -1,8 +1,10 @@
+import hashlib
 import os
 import re
 from collections import namedtuple
+from functools import lru_cache
 
-from lark import Transformer, Tree
+from lark import Lark, Transformer, Tree, __version__ as lark_version
 
 HeaderList = namedtuple('HeaderList', ['headers'])
 Header = namedtuple('Header', ['field', 'value'])
@@ -40,13 +42,42 @@ class BaseTransformer(Transformer):
         return ''.join([str(p) for p in parts])
 
     def _join_replace_whitespace(self, parts):
-        return re.sub(r'\s', '', self._join_parts(parts))	
+        return re.sub(r'\s', '', self._join_parts(parts))
+
+
+def grammar_parts(name, parser='earley'):
+    """
+    Grammar files making up `name` for the given Lark parser type, LALR uses rewritten variants.
+    """
+    if parser == 'lalr':
+        return [name + '_lalr', 'shared']
+    return [name, 'shared']
+
 
 def load_grammar(parts):
-    grammar = []
+    return '\n'.join([_read_grammar(grm) for grm in parts])
+
+
+@lru_cache(maxsize=None)
+def _read_grammar(name):
     dir_path = os.path.dirname(os.path.realpath(__file__))
-    for grm in parts:
-        grammar_path = os.path.join(dir_path, '../grammar/{}.lark'.format(grm))
-        with open(grammar_path, 'r') as f:
-            grammar.append(f.read())
-    return '\n'.join(grammar)
\ No newline at end of file
+    grammar_path = os.path.join(dir_path, '../grammar/{}.lark'.format(name))
+    with open(grammar_path, 'r') as f:
+        return f.read()
+
+
+class LarkCache:
+    """
+    Directory Lark parsers are saved to and loaded from across runs, None disables the disk cache.
+    Lark can only serialize LALR parsers, Earley parsers are always built in memory.
+    """
+    directory = None
+
+
+def build_lark(grammar, start, **options):
+    if LarkCache.directory and options.get('parser') == 'lalr':
+        key = grammar + start + repr(sorted(options.items())) + lark_version
+        md5 = hashlib.md5(key.encode('utf-8')).hexdigest()
+        os.makedirs(LarkCache.directory, exist_ok=True)
+        options['cache'] = os.path.join(LarkCache.directory, 'bogi-{}-{}.lark'.format(start, md5))
+    return Lark(grammar, start=start, **options)
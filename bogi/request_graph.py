@@ -0,0 +1,92 @@
+import re
+from collections import namedtuple
+from urllib.parse import urlparse
+
+from bogi.parser.tail_transformer import ContentLine
+
+VARIABLE_RE = re.compile(r'{{.+?}}')
+
+# required dependencies have to succeed for the request to run, others only order requests
+Dependency = namedtuple('Dependency', ['index', 'reason', 'required'])
+
+
+class RequestGraph:
+    """
+    Dependency graph of the requests of a single .http file.
+    A request depends on the earlier request it references with `<> id`, on the previous request sharing the
+    cookie jar for the same host, and on the previous request reading or writing `client.global` variables.
+    Requests without a path between them may run in any order. A request is only skipped when a request it
+    references, or takes variables from, failed; sharing a cookie jar only keeps requests in order.
+    """
+
+    def __init__(self, requests, script_loader=None):
+        self.requests = requests
+        self._script_loader = script_loader
+        self.dependencies = self._build()
+
+    def depends_on(self, index):
+        """
+        Indexes of the requests the request at `index` directly depends on.
+        """
+        return {d.index for d in self.dependencies[index]}
+
+    def requires(self, index):
+        """
+        Indexes of the requests the request at `index` directly depends on, which have to succeed for it to run.
+        """
+        return {d.index for d in self.dependencies[index] if d.required}
+
+    def _build(self):
+        dependencies = []
+        index_by_id = {}
+        last_cookie_request_by_host = {}
+        last_globals_request = None
+
+        for i, req in enumerate(self.requests):
+            deps = []
+
+            ref = req.tail.response_ref
+            if ref and ref.path in index_by_id:
+                deps.append(Dependency(index_by_id[ref.path], f'references response "{ref.path}"', True))
+
+            if '@no-cookie-jar' not in req.options:
+                host = urlparse(req.target).netloc
+                if host in last_cookie_request_by_host:
+                    deps.append(Dependency(last_cookie_request_by_host[host], f'shares cookie jar for "{host}"', False))
+                last_cookie_request_by_host[host] = i
+
+            if self._uses_globals(req):
+                if last_globals_request is not None:
+                    deps.append(Dependency(last_globals_request, 'uses client.global variables', True))
+                last_globals_request = i
+
+            if req.id:
+                index_by_id[req.id] = i
+            dependencies.append(deps)
+
+        return dependencies
+
+    def _handler_script(self, req):
+        if self._script_loader:
+            return self._script_loader(req)
+        h = req.tail.response_handler
+        return h.script if h else None
+
+    def _uses_globals(self, req):
+        script = self._handler_script(req)
+        if script and 'client.global' in script:
+            return True
+
+        parts = [req.target] + [h.value for h in req.headers]
+        if req.tail.message_body:
+            parts += [m.content for m in req.tail.message_body.messages if type(m) is ContentLine]
+        return any(VARIABLE_RE.search(p) for p in parts)
+
+    def __str__(self):
+        lines = []
+        for i, req in enumerate(self.requests):
+            req_id = f' ({req.id})' if req.id else ''
+            lines.append(f'#{i + 1} {req.method} {req.target}{req_id}')
+            for d in self.dependencies[i]:
+                lines.append(f'\t<- #{d.index + 1}: {d.reason}')
+        return '\n'.join(lines)
@@ -0,0 +1,129 @@
+import itertools
+import os
+from collections import namedtuple
+from types import MappingProxyType
+from urllib.parse import urlparse
+
+from bogi.parser.tail_transformer import ContentLine, InputFileRef, MultipartField
+
+# a request body file, read when the request is sent so changes to it are picked up between runs
+BodyFile = namedtuple('BodyFile', ['path'])
+
+# bytes read from body files at a time
+CHUNK_SIZE = 64 * 1024
+
+
+class BodyStream:
+    """
+    A request body including files, which are read in chunks as the body is sent rather than loaded into memory.
+    Its length is computed up front, so it's sent with a Content-Length rather than chunked.
+    Files are read again on every iteration, so a redirect can send the body again.
+    """
+
+    def __init__(self, parts):
+        self.parts = parts
+        self._length = sum(os.path.getsize(p.path) if type(p) is BodyFile else len(p) for p in parts)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for part in self.parts:
+            if type(part) is BodyFile:
+                with open(part.path, 'rb') as f:
+                    chunk = f.read(CHUNK_SIZE)
+                    while chunk:
+                        yield chunk
+                        chunk = f.read(CHUNK_SIZE)
+            else:
+                yield part
+
+
+class RequestPlan:
+    """
+    A Request compiled for sending: its resolved URL, headers, body and options, computed once and then
+    reused every time the request is sent. Bodies made of content lines only are encoded once, bodies
+    referencing files (`< ./file`) keep the encoded lines and stream the files on every send.
+    Plans are immutable.
+    """
+    __slots__ = ('method', 'url', 'host', 'headers', 'body_parts', 'allow_redirects', 'cookie_jar', 'options', 'http2')
+
+    def __init__(self, method, url, headers, body_parts, options, http_version=None):
+        set_ = super().__setattr__
+        set_('method', method)
+        set_('url', url)
+        set_('host', urlparse(url).netloc)
+        set_('headers', MappingProxyType(dict(headers)))
+        set_('body_parts', tuple(body_parts) if body_parts is not None else None)
+        set_('options', frozenset(options))
+        set_('allow_redirects', '@no-redirect' not in options)
+        set_('cookie_jar', '@no-cookie-jar' not in options)
+        # None when the request line has no HTTP version, leaving it to HttpRunner.http2
+        set_('http2', None if http_version is None else http_version.split('.')[0] == '2')
+
+    def __setattr__(self, name, value):
+        raise AttributeError('RequestPlan is immutable')
+
+    def body(self):
+        """
+        The request body as bytes, a BodyStream for bodies including files, or None for requests without one.
+        Files are sent as they are, they're expected to be in the charset of the request already.
+        """
+        parts = self.body_parts
+        if parts is None:
+            return None
+        if len(parts) == 1 and type(parts[0]) is bytes:
+            return parts[0]
+        return BodyStream(parts)
+
+    @classmethod
+    def compile(cls, req):
+        headers = {header.field: header.value for header in req.headers}
+        return cls(req.method, req.target, headers, _body_parts(req), req.options, http_version=req.http_version)
+
+
+def _body_parts(req):
+    if req.tail.message_body is None:
+        return None
+
+    messages = req.tail.message_body.messages
+    if messages and type(messages[0]) is MultipartField:
+        items = _multipart(messages, req.multipart_boundary)
+    else:
+        items = _messages(messages, '')
+
+    # consecutive text encoded together, files left to be streamed
+    encoding = req.charset or 'utf-8'
+    parts = []
+    for is_text, group in itertools.groupby(items, key=lambda item: type(item) is str):
+        if is_text:
+            parts.append(''.join(group).encode(encoding))
+        else:
+            parts += group
+    return parts or [b'']
+
+
+def _multipart(fields, boundary):
+    """
+    multipart/form-data body of MultipartFields, as text and BodyFiles. The lines of a part are joined with newlines.
+    """
+    items = []
+    for field in fields:
+        headers = ''.join(f'{h.field}: {h.value}\r\n' for h in field.headers)
+        items.append(f'--{boundary}\r\n{headers}\r\n')
+        items += _messages(field.messages, '\n')
+        items.append('\r\n')
+    items.append(f'--{boundary}--\r\n')
+    return items
+
+
+def _messages(messages, separator):
+    items = []
+    for m in messages:
+        if type(m) is ContentLine:
+            if items and type(items[-1]) is str:
+                items.append(separator)
+            items.append(m.content)
+        elif type(m) is InputFileRef:
+            items.append(BodyFile(m.path))
+    return items
@@ -5,6 +5,9 @@ class HttpClient:
     def __init__(self):
         setattr(self, 'assert', self._assert)
         setattr(self, 'global', Variables())
+        # `assert` and `global` are keywords in Python response handlers
+        self.assert_ = self._assert
+        self.global_ = getattr(self, 'global')
 
     """
     Creates test with name 'testName' and body 'func'.
@@ -65,7 +68,7 @@ class Variables:
         self.dict[varName] = varValue
 
     def get(self, varName):
-        self.dict.get(varName)
+        return self.dict.get(varName)
 
     def isEmpty(self):
         return len(self.dict) == 0
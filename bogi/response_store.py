@@ -0,0 +1,96 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import Counter, namedtuple
+
+# content is None for bodies spilled to the file at path
+StoredResponse = namedtuple('StoredResponse', ['status_code', 'headers', 'digest', 'size', 'content', 'path'])
+
+# bytes of a body hashed at a time
+CHUNK_SIZE = 1024 * 1024
+
+
+def body_digest(content):
+    sha = hashlib.sha256()
+    view = memoryview(content)
+    for i in range(0, len(view), CHUNK_SIZE):
+        sha.update(view[i:i + CHUNK_SIZE])
+    return sha.hexdigest()
+
+
+class ResponseStore:
+    """
+    Responses of the requests of a file which other requests reference with `<> id`, kept until every
+    reference was compared. Only the status code, headers and a SHA-256 digest of the body are needed to tell
+    matching responses apart; the body itself is kept for diffing mismatches, in memory, or in a file under
+    `spill_directory`, or the system's temporary directory, when it's larger than `memory_limit` bytes.
+    """
+    spill_directory = None
+    memory_limit = 1024 * 1024
+
+    def __init__(self, requests):
+        # references left to compare by ID, a response is released once they all were
+        self._references = Counter(r.tail.response_ref.path for r in requests if r.tail.response_ref)
+        self._remaining = Counter()
+        self._responses = {}
+        self.ids = []
+        self._lock = threading.Lock()
+
+    def __contains__(self, request_id):
+        return request_id in self._responses
+
+    def get(self, request_id):
+        return self._responses.get(request_id)
+
+    def put(self, request_id, resp):
+        if request_id not in self.ids:
+            self.ids.append(request_id)
+        if not self._references[request_id]:
+            return
+
+        content = resp.content or b''
+        stored = StoredResponse(status_code=resp.status_code, headers=resp.headers, digest=body_digest(content),
+                                size=len(content), content=content, path=None)
+        if len(content) > self.memory_limit:
+            stored = stored._replace(content=None, path=self._spill(content))
+        with self._lock:
+            self._discard(self._responses.get(request_id))
+            self._responses[request_id] = stored
+            self._remaining[request_id] = self._references[request_id]
+
+    def release(self, request_id):
+        """
+        Counts a compared reference to `request_id`, dropping its response once all references were compared.
+        """
+        with self._lock:
+            self._remaining[request_id] -= 1
+            if self._remaining[request_id] <= 0:
+                self._discard(self._responses.pop(request_id, None))
+
+    def content(self, stored):
+        if stored.content is not None:
+            return stored.content
+        with open(stored.path, 'rb') as f:
+            return f.read()
+
+    def close(self):
+        with self._lock:
+            for stored in self._responses.values():
+                self._discard(stored)
+            self._responses.clear()
+
+    def _spill(self, content):
+        if self.spill_directory:
+            os.makedirs(self.spill_directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix='bogi-response-', dir=self.spill_directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        return path
+
+    def _discard(self, stored):
+        if stored is not None and stored.path:
+            try:
+                os.remove(stored.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,228 @@
+import argparse
+import math
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from bogi.concurrency import BackgroundWriter, Recorder
+
+# request is the request ID, or the target URL for requests without one; latency and response_time are None for
+# requests which got no response
+ResultRow = namedtuple('ResultRow', ['file', 'request', 'method', 'url', 'success', 'status_code', 'latency',
+                                     'response_time', 'dns', 'connect', 'tls', 'ttfb', 'download', 'handler',
+                                     'error', 'timestamp'])
+
+RequestPercentile = namedtuple('RequestPercentile', ['request', 'method', 'runs', 'samples', 'value'])
+# value and baseline are the percentile response times in milliseconds of the run and of the runs before it
+Regression = namedtuple('Regression', ['request', 'method', 'value', 'baseline', 'ratio'])
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    file TEXT NOT NULL,
+    request TEXT NOT NULL,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    status_code INTEGER,
+    latency REAL,
+    response_time REAL,
+    dns REAL,
+    connect REAL,
+    tls REAL,
+    ttfb REAL,
+    download REAL,
+    handler REAL,
+    error TEXT,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_request ON results (request, method, run_id);
+'''
+
+
+class RequestResults(Recorder):
+    """
+    Results of the checks of a single file, as ResultRows to store once the file is done. Recording a check only
+    appends a tuple, the rows are written by ResultStore's thread.
+    """
+
+    def __init__(self, file=''):
+        super().__init__()
+        self.file = file
+        self.rows = []
+
+    def record(self, check, success):
+        req = check.request
+        timings = check.timings
+        responded = check.response_time is not None and check.response_time >= 0
+        row = ResultRow(file=self.file, request=req.id or req.target, method=req.method, url=req.target,
+                        success=success, status_code=check.status_code,
+                        latency=getattr(check, 'latency', None) if responded else None,
+                        response_time=check.response_time if responded else None,
+                        dns=timings.dns if timings else None, connect=timings.connect if timings else None,
+                        tls=timings.tls if timings else None, ttfb=timings.ttfb if timings else None,
+                        download=timings.download if timings else None,
+                        handler=timings.handler if timings else None,
+                        error=None if success else check.error, timestamp=time.time())
+        with self._lock:
+            self.rows.append(row)
+
+
+class ResultStore(BackgroundWriter):
+    """
+    Results of every run, kept in the SQLite database at `path` for looking at trends across runs.
+    Rows are inserted by a background thread, a file's rows in a single transaction, so storing results doesn't
+    hold up sending requests. Runs are numbered in the order they started.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.stored = 0
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+        # the writer thread's connection
+        self._db = None
+        super().__init__('bogi-result-store')
+
+    def start_run(self):
+        with self._connect() as db:
+            return db.execute('INSERT INTO runs (started) VALUES (?)', (time.time(),)).lastrowid
+
+    def finish_run(self, run_id):
+        """
+        Blocks until the results reported for the run were stored.
+        """
+        self.put(('finish', run_id, time.time()))
+        self.flush()
+
+    def report(self, run_id, results):
+        if results is not None and results.rows:
+            self.put(('results', run_id, results.rows))
+
+    def percentiles(self, percentile=95, runs=100, request=None):
+        """
+        The `percentile` response time of successful checks of every request, or of `request`, over the last
+        `runs` runs it ran in, as RequestPercentiles.
+        """
+        with self._connect() as db:
+            if request is None:
+                samples = self._samples(db, runs)
+            else:
+                samples = self._samples(db, runs, 'request = ?', [request])
+        return [RequestPercentile(request=req, method=method, runs=len(run_ids), samples=len(times),
+                                  value=_percentile(times, percentile))
+                for (req, method), (run_ids, times) in sorted(samples.items())]
+
+    def regressions(self, run_id, percentile=95, baseline_runs=20, threshold=1.5, min_samples=5):
+        """
+        Requests whose `percentile` response time in the run is over `threshold` times their baseline, that is
+        the same percentile over the last `baseline_runs` runs each request ran in before it, as Regressions.
+        Requests with fewer than `min_samples` baseline samples aren't compared.
+        """
+        with self._connect() as db:
+            current = self._samples(db, 1, 'run_id = ?', [run_id])
+            baseline = self._samples(db, baseline_runs, 'run_id < ?', [run_id])
+
+        res = []
+        for key, (_, times) in sorted(current.items()):
+            base_times = baseline.get(key, (set(), []))[1]
+            if len(base_times) < min_samples:
+                continue
+            value, base = _percentile(times, percentile), _percentile(base_times, percentile)
+            if base > 0 and value > base * threshold:
+                res.append(Regression(request=key[0], method=key[1], value=value, baseline=base, ratio=value / base))
+        return res
+
+    def _samples(self, db, runs, condition='1', params=()):
+        """
+        Response times of the successful checks of every request over the last `runs` runs among those matching
+        `condition` which it ran in, so files which don't run every time are compared to their own earlier runs.
+        Returned as (request, method) -> (run IDs, response times).
+        """
+        samples = {}
+        rows = db.execute('SELECT request, method, run_id, response_time FROM results '
+                          'JOIN (SELECT request, method, run_id, '
+                          'DENSE_RANK() OVER (PARTITION BY request, method ORDER BY run_id DESC) AS recent '
+                          f'FROM results WHERE {condition} GROUP BY request, method, run_id) AS request_runs '
+                          'USING (request, method, run_id) '
+                          'WHERE recent <= ? AND success = 1 AND response_time IS NOT NULL',
+                          list(params) + [runs])
+        for req, method, run_id, response_time in rows:
+            run_ids, times = samples.setdefault((req, method), (set(), []))
+            run_ids.add(run_id)
+            times.append(response_time)
+        return samples
+
+    def _open(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        # readers don't wait for the writer thread, nor the writer for them
+        db.execute('PRAGMA journal_mode=WAL')
+        return db
+
+    @contextmanager
+    def _connect(self):
+        db = self._open()
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _write(self, batch):
+        if self._db is None:
+            self._db = self._open()
+        for kind, run_id, value in batch:
+            with self._db:
+                if kind == 'finish':
+                    self._db.execute('UPDATE runs SET finished = ? WHERE id = ?', (value, run_id))
+                else:
+                    self._db.executemany(f'INSERT INTO results (run_id, {", ".join(ResultRow._fields)}) '
+                                         f'VALUES (?, {", ".join("?" * len(ResultRow._fields))})',
+                                         [(run_id,) + tuple(row) for row in value])
+                    self.stored += len(value)
+
+    def _stopped(self):
+        if self._db is not None:
+            self._db.close()
+
+
+def _percentile(values, percentile):
+    """
+    Nearest-rank percentile.
+    """
+    values = sorted(values)
+    rank = max(1, math.ceil(percentile / 100 * len(values)))
+    return values[rank - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Response time percentiles of the requests stored in a results '
+                                                 'database written with --results-db')
+    parser.add_argument('path', type=str, help='SQLite database written with --results-db')
+    parser.add_argument('--request', type=str, required=False, help='Request ID, or URL of requests without one')
+    parser.add_argument('--percentile', type=float, default=95)
+    parser.add_argument('--runs', type=int, default=100, help='How many of the last runs to look at')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        parser.error(f'{args.path} does not exist')
+    store = ResultStore(args.path)
+    try:
+        rows = store.percentiles(percentile=args.percentile, runs=args.runs, request=args.request)
+    finally:
+        store.close()
+    width = max([len(r.request) + len(r.method) + 1 for r in rows] + [7])
+    print(f'{"request":<{width}} {"runs":>6} {"samples":>8} {"p" + format(args.percentile, "g"):>10}')
+    for r in rows:
+        print(f'{r.method + " " + r.request:<{width}} {r.runs:>6} {r.samples:>8} {r.value:>8.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import heapq
+import random
+import re
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from bogi import bcolors
+from bogi.logger import logger
+
+DURATION_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*$')
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, None: 1}
+
+ScheduledFile = namedtuple('ScheduledFile', ['path', 'interval'])
+
+
+def parse_duration(value):
+    """
+    Seconds in a duration like `500ms`, `30s`, `5m` or `1h`, plain numbers are seconds.
+    """
+    m = DURATION_RE.match(value)
+    if not m:
+        raise ValueError(f'Invalid duration "{value}"')
+    return float(m.group(1)) * DURATION_UNITS[m.group(2)]
+
+
+def file_interval(requests, default):
+    """
+    The shortest `@interval` option of the requests of a file, or `default` if none has one.
+    """
+    intervals = []
+    for req in requests:
+        for option in req.options:
+            name, _, value = option.partition(' ')
+            if name == '@interval':
+                try:
+                    intervals.append(parse_duration(value))
+                except ValueError as e:
+                    logger.error(f'{bcolors.WARNING}{e}, ignoring @interval{bcolors.ENDC}')
+    return min(intervals) if intervals else default
+
+
+class Scheduler:
+    """
+    Runs every file on its own fixed-rate timer: the k-th run of a file is due `k * interval` after its first,
+    however long earlier runs took, plus a random jitter of up to `jitter * interval` to spread files out.
+    At most `concurrency` files run at once, and a file never overlaps itself. A run which couldn't start
+    before its next one was due, because the file was still running or every slot was busy, is counted
+    as a missed deadline and skipped.
+    """
+
+    def __init__(self, files, run_file, concurrency=4, jitter=0.1):
+        self.files = files
+        self.run_file = run_file
+        self.concurrency = concurrency
+        self.jitter = jitter
+        self.runs = Counter()
+        self.missed = Counter()
+        self._running = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self):
+        """
+        Runs files on schedule until `stop` is called.
+        """
+        start = time.monotonic()
+        # (due, index, run number, when run 0 was due without jitter)
+        queue = []
+        for i, f in enumerate(self.files):
+            base = start + random.uniform(0, self.jitter) * f.interval
+            queue.append((base, i, 0, base))
+        heapq.heapify(queue)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while queue and not self._stop.is_set():
+                due, i, k, base = heapq.heappop(queue)
+                if self._stop.wait(max(0.0, due - time.monotonic())):
+                    break
+
+                f = self.files[i]
+                with self._lock:
+                    running = f.path in self._running
+                    if not running:
+                        self._running.add(f.path)
+                if running:
+                    self._missed(f, 'still running')
+                else:
+                    executor.submit(self._run, f, due)
+
+                # fixed rate, deadlines which passed while this one waited are missed
+                k += 1
+                while base + k * f.interval <= time.monotonic():
+                    self._missed(f, 'scheduler fell behind')
+                    k += 1
+                jitter = random.uniform(0, self.jitter) * f.interval
+                heapq.heappush(queue, (base + k * f.interval + jitter, i, k, base))
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, f, due):
+        try:
+            if time.monotonic() - due >= f.interval:
+                self._missed(f, 'no free slot')
+                return
+            with self._lock:
+                self.runs[f.path] += 1
+            self.run_file(f.path)
+        except Exception as e:
+            logger.exception(e)
+        finally:
+            with self._lock:
+                self._running.discard(f.path)
+
+    def _missed(self, f, reason):
+        with self._lock:
+            self.missed[f.path] += 1
+            missed = self.missed[f.path]
+        logger.warning(f'{bcolors.WARNING}Missed a scheduled run of {f.path} ({reason}, '
+                       f'{missed} missed so far){bcolors.ENDC}')
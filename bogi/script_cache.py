@@ -0,0 +1,111 @@
+import hashlib
+import os
+import threading
+from functools import lru_cache
+from importlib import metadata
+
+
+@lru_cache(maxsize=None)
+def _js2py_version():
+    try:
+        return metadata.version('js2py')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+class ScriptCache:
+    """
+    Response handler scripts translated from JavaScript to Python by js2py and compiled, by content hash.
+    When `directory` is set, the translated Python source is also saved there, so later runs skip translation.
+    Scripts run on pooled js2py contexts, which are reset to their initial variables after each run.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._compiled = {}
+        self._contexts = []
+        self._lock = threading.Lock()
+        self._initial_vars = None
+
+    def execute(self, script, variables):
+        """
+        Runs `script` with `variables` defined in its global scope, raising what the script raises.
+        """
+        code = self.compile(script)
+        context = self._acquire_context()
+        try:
+            for name, value in variables.items():
+                setattr(context, name, value)
+            exec(code, context._context)
+        finally:
+            self._release_context(context)
+
+    def compile(self, script):
+        key = hashlib.sha256((_js2py_version() + '\n' + script).encode('utf-8')).hexdigest()
+        code = self._compiled.get(key)
+        if code is None:
+            code = compile(self._translate(key, script), '<response handler {}>'.format(key[:12]), 'exec')
+            self._compiled[key] = code
+        return code
+
+    def _translate(self, key, script):
+        import js2py  # imported on the first JavaScript handler, it takes a good part of startup
+
+        if not self.directory:
+            return js2py.translate_js(script, '')
+
+        path = os.path.join(self.directory, key + '.py')
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+
+        code = js2py.translate_js(script, '')
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(code)
+        os.replace(tmp_path, path)
+        return code
+
+    def _acquire_context(self):
+        with self._lock:
+            if self._contexts:
+                return self._contexts.pop()
+
+        import js2py
+
+        context = js2py.EvalJs()
+        if self._initial_vars is None:
+            self._initial_vars = set(context._context['var'].own)
+        return context
+
+    def _release_context(self, context):
+        scope = context._context['var']
+        for name in set(scope.own) - self._initial_vars:
+            del scope.own[name]
+        with self._lock:
+            self._contexts.append(context)
+
+
+class PythonScriptCache:
+    """
+    Python response handler scripts compiled once, by file name and content.
+    Scripts run on a fresh globals dict per run, with `variables` defined in it.
+    """
+
+    def __init__(self):
+        self._compiled = {}
+
+    def execute(self, script, variables, filename='<response handler>'):
+        """
+        Runs `script` with `variables` defined as its globals, raising what the script raises.
+        """
+        exec(self.compile(script, filename), dict(variables))
+
+    def compile(self, script, filename='<response handler>'):
+        key = (filename, script)
+        code = self._compiled.get(key)
+        if code is None:
+            code = compile(script, filename, 'exec')
+            self._compiled[key] = code
+        return code
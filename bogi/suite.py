@@ -0,0 +1,95 @@
+import os
+import time
+from collections import namedtuple
+from contextlib import ExitStack
+
+import lark
+
+from bogi import bcolors
+from bogi.async_runner import AsyncHttpRunner
+from bogi.callbacks import HistogramCallback, LoggerCallback
+from bogi.http_runner import HttpRunner
+from bogi.logger import logger
+from bogi.metrics import RequestMetrics
+from bogi.parser.cache import ParsedFileCache
+from bogi.result_store import RequestResults
+
+# callback is the file's callback, or the exception raised while running it
+FileResult = namedtuple('FileResult', ['path', 'callback', 'runtime'])
+
+
+# shared by all runs of this process, so loops reuse requests along with the RequestPlans compiled for them
+parsed_files = ParsedFileCache()
+
+
+def parse_files(paths, parser='earley'):
+    """
+    Parses .http files, returning (path, requests) pairs. Files which fail to parse are logged and left out.
+    Files which didn't change since they were last parsed aren't parsed again.
+    """
+    parsed = []
+    for path in paths:
+        try:
+            requests = parsed_files.parse(path, parser=parser)
+        except lark.LarkError as e:
+            logger.error(f'{bcolors.WARNING}Parsing error in {os.path.basename(path)}{bcolors.ENDC}\n{str(e)}')
+            continue
+        parsed.append((path, requests))
+    return parsed
+
+
+def run_files(paths, base_dir, parser='earley', concurrency=1, host_concurrency=None, print_graph=False,
+              aggregate=False, metrics=False, results=False):
+    """
+    Parses and runs .http files, yielding a FileResult for every file which parsed.
+    With `aggregate`, callbacks keep latency histograms instead of every success.
+    With `metrics`, callbacks count checks in RequestMetrics for the metrics endpoint.
+    With `results`, callbacks keep the results of checks in RequestResults for the result store.
+    """
+    parsed = parse_files(paths, parser=parser)
+    runners = []
+    for path, requests in parsed:
+        logger.info(f'{bcolors.HEADER}Processing {os.path.basename(path)}, {len(requests)} requests.{bcolors.ENDC}')
+        callback = HistogramCallback(logger) if aggregate else LoggerCallback(logger)
+        if metrics:
+            callback.metrics = RequestMetrics()
+        if results:
+            callback.results = RequestResults(os.path.basename(path))
+        runner = HttpRunner(requests, base_dir=base_dir, callback=callback, ignore_headers=True)
+        if concurrency > 1:
+            runners.append(runner)
+        else:
+            yield _run_file(path, runner, print_graph)
+
+    if runners:
+        yield from _run_concurrently([path for path, _ in parsed], runners, concurrency, host_concurrency, print_graph)
+
+
+def _run_file(path, runner, print_graph):
+    start = time.perf_counter()
+    try:
+        with runner:
+            if print_graph:
+                logger.info(str(runner.graph))
+            callback = runner.run()
+    except Exception as e:
+        callback = e
+    return FileResult(path=path, callback=callback, runtime=time.perf_counter() - start)
+
+
+def _run_concurrently(paths, runners, concurrency, host_concurrency, print_graph):
+    if print_graph:
+        for runner in runners:
+            try:
+                logger.info(str(runner.graph))
+            except Exception:
+                # reported once the runner runs
+                pass
+
+    with ExitStack() as stack:
+        for runner in runners:
+            stack.enter_context(runner)
+        callbacks = AsyncHttpRunner(concurrency=concurrency, host_concurrency=host_concurrency).run(runners)
+
+    for path, runner, callback in zip(paths, runners, callbacks):
+        yield FileResult(path=path, callback=callback, runtime=runner.runtime)
@@ -0,0 +1,146 @@
+import socket
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+from bogi.dns import dns_cache
+
+# Milliseconds spent in each phase of a request. Phases a request skipped, e.g. dns, connect and tls on a reused
+# connection, are 0. handler is the time spent checking the response, running its handler and comparing it.
+RequestTimings = namedtuple('RequestTimings', ['dns', 'connect', 'tls', 'ttfb', 'download', 'handler'])
+
+PHASES = RequestTimings._fields
+
+_local = threading.local()
+
+
+class PhaseRecorder:
+    """
+    Nanoseconds spent in each phase of the request currently sent on this thread, summed over redirects.
+    """
+
+    def __init__(self):
+        self.ns = dict.fromkeys(PHASES, 0)
+
+    def add(self, phase, ns):
+        self.ns[phase] += ns
+
+    @property
+    def headers_ms(self):
+        """
+        Milliseconds from sending the request to receiving the response headers.
+        """
+        return sum(self.ns[p] for p in ('dns', 'connect', 'tls', 'ttfb')) / 1e6
+
+    @property
+    def total_ms(self):
+        return sum(self.ns.values()) / 1e6
+
+    def timings(self):
+        return RequestTimings(**{p: ns / 1e6 for p, ns in self.ns.items()})
+
+
+def start_recording():
+    """
+    Starts recording the phases of the next request sent on this thread, returning the PhaseRecorder.
+    """
+    _local.recorder = PhaseRecorder()
+    return _local.recorder
+
+
+def record_phase(phase, ns):
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is not None:
+        recorder.add(phase, ns)
+
+
+class TimedHTTPConnection(HTTPConnection):
+
+    def _new_conn(self):
+        start = time.perf_counter_ns()
+        try:
+            addresses = dns_cache.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NewConnectionError(self, 'Failed to establish a new connection: %s' % e)
+        resolved = time.perf_counter_ns()
+        record_phase('dns', resolved - start)
+
+        dns_host = self._dns_host
+        try:
+            for i, (_, _, _, _, address) in enumerate(addresses):
+                self._dns_host = address[0]
+                try:
+                    conn = super()._new_conn()
+                    break
+                except NewConnectionError:
+                    if i == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = dns_host
+            record_phase('connect', time.perf_counter_ns() - resolved)
+        return conn
+
+
+class TimedHTTPSConnection(TimedHTTPConnection, HTTPSConnection):
+
+    def connect(self):
+        recorder = getattr(_local, 'recorder', None)
+        before = sum(recorder.ns.values()) if recorder else 0
+        start = time.perf_counter_ns()
+        try:
+            super().connect()
+        finally:
+            # whatever connect() spent beyond resolving and connecting went to the TLS handshake
+            after = sum(recorder.ns.values()) if recorder else 0
+            record_phase('tls', time.perf_counter_ns() - start - (after - before))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter recording the phases of the requests it sends to the PhaseRecorder of the sending thread.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, stream=False, **kwargs):
+        recorder = getattr(_local, 'recorder', None)
+        before = sum(recorder.ns.values()) if recorder else 0
+        start = time.perf_counter_ns()
+        resp = super().send(request, stream=True, **kwargs)
+        headers = time.perf_counter_ns()
+        after = sum(recorder.ns.values()) if recorder else 0
+        record_phase('ttfb', headers - start - (after - before))
+
+        if not stream:
+            resp.content  # reads the body, as requests would right after send()
+            record_phase('download', time.perf_counter_ns() - headers)
+        return resp
+
+
+def timed_session():
+    """
+    A requests Session sending its requests through TimedHTTPAdapter.
+    """
+    session = requests.Session()
+    session.mount('http://', TimedHTTPAdapter())
+    session.mount('https://', TimedHTTPAdapter())
+    return session
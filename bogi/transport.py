@@ -0,0 +1,199 @@
+import os
+import threading
+from collections import Counter
+
+import requests
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.ssl_ import create_urllib3_context, resolve_cert_reqs, resolve_ssl_version
+
+from bogi.timing import TimedHTTPAdapter, TimedHTTPConnection, TimedHTTPSConnection
+
+
+class TransportStats:
+    """
+    Requests sent through the shared pools, connections they opened and TLS handshakes which resumed a session.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    @property
+    def hit_rate(self):
+        """
+        Share of requests sent on a pooled connection rather than a new one.
+        """
+        requests_ = self.counts['requests']
+        return max(0.0, 1 - self.counts['connections'] / requests_) if requests_ else 0.0
+
+    def summary(self):
+        c = self.counts
+        return (f'{c["requests"]} requests, {c["connections"]} connections opened, {self.hit_rate:.1%} pool hits, '
+                f'{c["tls_handshakes"]} TLS handshakes, {c["tls_resumed"]} resumed')
+
+
+class Transport:
+    """
+    Connection pools shared by every session of the process, so files, loops and `@no-cookie-jar` requests reuse
+    kept-alive connections, and new TLS connections to a host resume the session of the previous one.
+    Sessions only hold cookies. Pools are kept for up to `pool_connections` hosts, with up to `pool_maxsize`
+    idle connections each.
+    """
+    pool_connections = 100
+    pool_maxsize = 10
+    stats = TransportStats()
+
+    _adapter = None
+    _pid = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def adapter(cls):
+        with cls._lock:
+            # connections aren't shared with forked worker processes
+            if cls._adapter is None or cls._pid != os.getpid():
+                cls._adapter = PooledHTTPAdapter(pool_connections=cls.pool_connections,
+                                                 pool_maxsize=cls.pool_maxsize)
+                cls._pid = os.getpid()
+            return cls._adapter
+
+    @classmethod
+    def close(cls):
+        """
+        Closes the pooled connections, later sessions open new ones.
+        """
+        with cls._lock:
+            if cls._adapter is not None:
+                cls._adapter.close()
+            cls._adapter = None
+
+
+class TransportSession(requests.Session):
+    """
+    A Session with a cookie jar of its own, sending through the shared Transport pools. Closing it leaves them open.
+    """
+
+    def __init__(self):
+        super().__init__()
+        adapter = Transport.adapter()
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def close(self):
+        pass
+
+
+class _ResumingContext:
+    """
+    Wraps the SSLContext shared by the connections to a host, offering them the TLS session of the last
+    handshake. Certificates are only loaded into it once.
+    """
+
+    def __init__(self, context):
+        object.__setattr__(self, '_context', context)
+        object.__setattr__(self, '_loaded', set())
+        object.__setattr__(self, 'session', None)
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+    def __setattr__(self, name, value):
+        if name == 'session':
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._context, name, value)
+
+    def load_verify_locations(self, *args, **kwargs):
+        self._load('load_verify_locations', args, kwargs)
+
+    def load_cert_chain(self, *args, **kwargs):
+        self._load('load_cert_chain', args, kwargs)
+
+    def load_default_certs(self, *args, **kwargs):
+        self._load('load_default_certs', args, kwargs)
+
+    def wrap_socket(self, sock, server_hostname=None, **kwargs):
+        sock = self._context.wrap_socket(sock, server_hostname=server_hostname, session=self.session, **kwargs)
+        Transport.stats.count('tls_handshakes')
+        if sock.session_reused:
+            Transport.stats.count('tls_resumed')
+        return sock
+
+    def _load(self, method, args, kwargs):
+        key = (method, args, tuple(sorted(kwargs.items())))
+        if key not in self._loaded:
+            getattr(self._context, method)(*args, **kwargs)
+            self._loaded.add(key)
+
+
+class PooledHTTPConnection(TimedHTTPConnection):
+
+    def _new_conn(self):
+        Transport.stats.count('connections')
+        return super()._new_conn()
+
+
+class PooledHTTPSConnection(PooledHTTPConnection, TimedHTTPSConnection):
+
+    def getresponse(self, *args, **kwargs):
+        # TLS 1.3 servers send session tickets after the handshake, they have been read with the response
+        resp = super().getresponse(*args, **kwargs)
+        self._remember_session()
+        return resp
+
+    def close(self):
+        self._remember_session()
+        super().close()
+
+    def _remember_session(self):
+        sock = self.sock
+        if sock is not None and isinstance(self.ssl_context, _ResumingContext):
+            session = getattr(sock, 'session', None)
+            if session is not None:
+                self.ssl_context.session = session
+
+
+class PooledHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = PooledHTTPConnection
+
+
+class PooledHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = PooledHTTPSConnection
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._resuming_context = None
+
+    def _prepare_conn(self, conn):
+        conn = super()._prepare_conn(conn)
+        # one context per pool, that is per host and TLS settings, TLS sessions can only be resumed on their context
+        if conn.ssl_context is None:
+            if self._resuming_context is None:
+                context = create_urllib3_context(ssl_version=resolve_ssl_version(conn.ssl_version),
+                                                 cert_reqs=resolve_cert_reqs(conn.cert_reqs))
+                if not conn.ca_certs and not conn.ca_cert_dir and not conn.ca_cert_data:
+                    context.load_default_certs()
+                self._resuming_context = _ResumingContext(context)
+            conn.ssl_context = self._resuming_context
+        return conn
+
+
+class PooledHTTPAdapter(TimedHTTPAdapter):
+    """
+    TimedHTTPAdapter counting requests and connections in Transport.stats.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': PooledHTTPConnectionPool,
+            'https': PooledHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        Transport.stats.count('requests')
+        return super().send(request, **kwargs)
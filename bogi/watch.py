@@ -0,0 +1,127 @@
+import os
+import time
+
+import lark
+
+from bogi.http_runner import HttpRunner
+from bogi.parser.tail_transformer import InputFileRef, MultipartField
+from bogi.suite import parsed_files
+
+
+def http_files(http_path):
+    if os.path.isdir(http_path):
+        return [os.path.join(http_path, fname) for fname in os.listdir(http_path) if fname.endswith('.http')]
+    return [http_path] if os.path.exists(http_path) else []
+
+
+def dependencies(requests, base_dir):
+    """
+    Absolute paths of the files requests read when they run: response handler scripts and request body files.
+    """
+    res = set()
+    for req in requests:
+        h = req.tail.response_handler
+        if h is not None and h.path:
+            res.add(os.path.abspath(os.path.join(base_dir, h.path)))
+        if req.tail.message_body is not None:
+            for m in req.tail.message_body.messages:
+                messages = m.messages if type(m) is MultipartField else [m]
+                # body files are opened relative to the working directory
+                res.update(os.path.abspath(f.path) for f in messages if type(f) is InputFileRef)
+    return res
+
+
+class FileWatcher:
+    """
+    Watches the .http files at `http_path`, a directory or a single file, along with the scripts and body files
+    their requests read, telling which .http files need to run again after some of them changed.
+    Files are polled every `interval` seconds for a changed mtime or size, which works the same on every platform
+    and file system, and changes are collected until none came for `debounce` seconds, so saving several files
+    at once runs them once.
+    """
+    interval = 0.5
+    debounce = 0.3
+
+    def __init__(self, http_path, base_dir, parser='earley'):
+        self.http_path = http_path
+        self.base_dir = base_dir
+        self.parser = parser
+        # .http file -> absolute paths of the files its requests read
+        self._dependencies = {}
+        self.update(http_files(http_path))
+        self._stats = self._stat_all()
+
+    def update(self, paths):
+        """
+        Looks up again the files the requests of `paths` read, after they were parsed again.
+        """
+        for path in paths:
+            try:
+                requests = parsed_files.parse(path, parser=self.parser)
+            except (OSError, lark.LarkError):
+                # reported when the file runs, the files it read before are still watched
+                continue
+            self._dependencies[os.path.abspath(path)] = dependencies(requests, self.base_dir)
+
+    def wait(self):
+        """
+        Blocks until watched files changed, returning the .http files to run again.
+        """
+        changed = set()
+        last_change = None
+        while True:
+            found = self.poll()
+            if found:
+                changed |= found
+                last_change = time.monotonic()
+            elif changed and time.monotonic() - last_change >= self.debounce:
+                paths = self.affected(changed)
+                if paths:
+                    return paths
+                changed = set()
+            time.sleep(self.interval)
+
+    def poll(self):
+        """
+        Absolute paths of the watched files which were changed, added or removed since the last poll.
+        """
+        stats = self._stat_all()
+        changed = {path for path in stats.keys() | self._stats.keys() if stats.get(path) != self._stats.get(path)}
+        self._stats = stats
+        return changed
+
+    def affected(self, changed):
+        """
+        .http files to run again after `changed` files changed: changed and new .http files, and those reading
+        any of the changed files. Removed .http files are forgotten.
+        """
+        paths = set()
+        for path in http_files(self.http_path):
+            key = os.path.abspath(path)
+            if key in changed or self._dependencies.get(key, set()) & changed:
+                paths.add(path)
+        for key in set(self._dependencies) - {os.path.abspath(p) for p in http_files(self.http_path)}:
+            del self._dependencies[key]
+
+        # scripts are read once per process, changed ones are read again
+        for script in list(HttpRunner.response_handler_scripts):
+            if os.path.abspath(os.path.join(self.base_dir, script)) in changed:
+                del HttpRunner.response_handler_scripts[script]
+
+        self.update(sorted(paths))
+        # dependencies added since are watched from now on
+        self._stats = self._stat_all()
+        return paths
+
+    def _stat_all(self):
+        paths = {os.path.abspath(p) for p in http_files(self.http_path)}
+        for deps in self._dependencies.values():
+            paths |= deps
+        stats = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bogi.callbacks import CallbackBase
+from bogi.suite import FileResult, run_files
+
+# Stands in for Request in the results workers send back, keeping them small and picklable
+RequestSummary = namedtuple('RequestSummary', ['id', 'method', 'target'])
+
+
+class WorkerError(Exception):
+    pass
+
+
+class FileRuntimes:
+    """
+    Past runtimes of .http files, used to balance files across workers.
+    Kept as an exponential moving average, and saved to `path` as JSON when given.
+    """
+    smoothing = 0.5
+
+    def __init__(self, path=None):
+        self.path = path
+        self.runtimes = {}
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                self.runtimes = json.load(f)
+
+    def get(self, http_path, default=None):
+        return self.runtimes.get(os.path.abspath(http_path), default)
+
+    def update(self, http_path, runtime):
+        if runtime is None:
+            return
+        key = os.path.abspath(http_path)
+        if key in self.runtimes:
+            runtime = self.smoothing * runtime + (1 - self.smoothing) * self.runtimes[key]
+        self.runtimes[key] = runtime
+
+    def save(self):
+        if self.path:
+            # written to a temporary file first, scheduled files save their runtimes concurrently
+            tmp_path = f'{self.path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(dict(self.runtimes), f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def shard(paths, workers, runtimes):
+    """
+    Splits paths into at most `workers` shards of about the same total runtime, assigning the slowest file
+    to the least loaded shard first. Files without a past runtime count as the average known runtime.
+    """
+    known = [r for r in (runtimes.get(p) for p in paths) if r is not None]
+    default = sum(known) / len(known) if known else 1.0
+
+    shards = [[] for _ in range(min(workers, len(paths)))]
+    loads = [0.0] * len(shards)
+    for path in sorted(paths, key=lambda p: runtimes.get(p, default), reverse=True):
+        i = loads.index(min(loads))
+        shards[i].append(path)
+        loads[i] += runtimes.get(path, default)
+    return shards
+
+
+def run_in_workers(paths, base_dir, workers, runtimes, **options):
+    """
+    Runs .http files on a pool of `workers` processes, yielding a FileResult for every file as shards finish.
+    Callbacks are compacted to hold RequestSummary instead of Request, exceptions are turned into WorkerError.
+    Takes the same options as `run_files`.
+    """
+    shards = shard(paths, workers, runtimes)
+    with ProcessPoolExecutor(max_workers=len(shards) or 1) as pool:
+        futures = [pool.submit(_run_shard, s, base_dir, options) for s in shards]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def _run_shard(paths, base_dir, options):
+    results = []
+    for result in run_files(paths, base_dir, **options):
+        if isinstance(result.callback, Exception):
+            callback = WorkerError(''.join(traceback.format_exception(
+                type(result.callback), result.callback, result.callback.__traceback__)))
+        else:
+            callback = _compact(result.callback)
+        results.append(FileResult(path=result.path, callback=callback, runtime=result.runtime))
+    return results
+
+
+def _compact(callback):
+    res = CallbackBase()
+    res.successes = [s._replace(request=_summary(s.request)) for s in callback.successes]
+    res.failures = [f._replace(request=_summary(f.request)) for f in callback.failures]
+    res.handler_times = callback.handler_times
+    res.histograms = callback.histograms
+    res.metrics = callback.metrics
+    res.results = callback.results
+    return res
+
+
+def _summary(req):
+    return RequestSummary(id=req.id, method=req.method, target=req.target)
@@ -0,0 +1,5 @@
+assert response.status == 410, 'Response status is not 410'
+assert response.body.hasOwnProperty('headers'), "Cannot find 'headers' option in response"
+
+mime_type = response.contentType['mimeType']
+assert mime_type == 'application/json', f"Expected 'application/json' but received '{mime_type}'"
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import multiprocessing
+import threading
+
+PREFACE = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+
+
+class Server:
+    """
+    Answers HTTP/1.1 with keep-alive, and HTTP/2 with prior knowledge (h2c), told apart by the HTTP/2 preface.
+    Every response is sent `delay` seconds after its request, and echoes the path and protocol as JSON.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        # shared with the benchmark when serving from a process of its own
+        self._connections = multiprocessing.Value('i', 0)
+        self.url = None
+        self._loop = None
+        self._server = None
+
+    @property
+    def connections(self):
+        return self._connections.value
+
+    def start(self):
+        started = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, '127.0.0.1', 0))
+            self.url = 'http://127.0.0.1:{}'.format(self._server.sockets[0].getsockname()[1])
+            started.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        started.wait()
+        return self.url
+
+    def stop(self):
+        async def close():
+            self._server.close()
+            await self._server.wait_closed()
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _body(self, path, protocol):
+        return json.dumps({'path': path, 'protocol': protocol}).encode('utf-8')
+
+    async def _handle(self, reader, writer):
+        with self._connections.get_lock():
+            self._connections.value += 1
+        try:
+            start = await reader.readexactly(len(PREFACE))
+            if start == PREFACE:
+                await self._handle_h2(start, reader, writer)
+            else:
+                await self._handle_http1(start, reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_http1(self, data, reader, writer):
+        while data:
+            while b'\r\n\r\n' not in data:
+                data += await reader.readuntil(b'\r\n\r\n')
+            head, _, data = data.partition(b'\r\n\r\n')
+            lines = head.decode('latin-1').split('\r\n')
+            headers = {k.lower(): v for k, v in (line.split(': ', 1) for line in lines[1:])}
+            length = int(headers.get('content-length', 0))
+            if len(data) < length:
+                data += await reader.readexactly(length - len(data))
+            data = data[length:]
+
+            await asyncio.sleep(self.delay)
+            body = self._body(lines[0].split(' ')[1], 'HTTP/1.1')
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s'
+                         % (len(body), body))
+            await writer.drain()
+            if not data:
+                data = await reader.read(65536)
+
+    async def _handle_h2(self, data, reader, writer):
+        import h2.config
+        import h2.connection
+        import h2.events
+
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        paths = {}
+
+        async def respond(stream_id):
+            await asyncio.sleep(self.delay)
+            body = self._body(paths.pop(stream_id), 'HTTP/2')
+            conn.send_headers(stream_id, [(':status', '200'), ('content-type', 'application/json'),
+                                          ('content-length', str(len(body)))])
+            conn.send_data(stream_id, body, end_stream=True)
+            writer.write(conn.data_to_send())
+
+        while data:
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    paths[event.stream_id] = dict(event.headers)[b':path'].decode('utf-8')
+                elif isinstance(event, h2.events.DataReceived):
+                    conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, h2.events.StreamEnded):
+                    asyncio.ensure_future(respond(event.stream_id))
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    return
+            writer.write(conn.data_to_send())
+            await writer.drain()
+            data = await reader.read(65536)
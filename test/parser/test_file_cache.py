@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from bogi.parser import cache
+from bogi.parser.cache import ParsedFileCache
+from test.utils import dedent
+
+CODE = dedent('''
+### get-a
+GET http://example.com/a
+
+### post-b
+POST http://example.com/b
+Content-Type: application/json
+
+{"b": 1}
+''')
+
+
+class ParsedFileCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'requests.http')
+        self._write(CODE)
+
+    def tearDown(self):
+        ParsedFileCache.directory = None
+        self.tmp.cleanup()
+
+    def _write(self, code, mtime_ns=None):
+        with open(self.path, 'w') as f:
+            f.write(code)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_in_memory(self):
+        files = ParsedFileCache()
+        requests = files.parse(self.path)
+        self.assertEqual([r.id for r in requests], ['get-a', 'post-b'])
+        self.assertIs(files.parse(self.path), requests)
+
+        # touched, same content
+        self._write(CODE, mtime_ns=os.stat(self.path).st_mtime_ns + 10 ** 9)
+        self.assertIs(files.parse(self.path), requests)
+        self.assertEqual(files.parsed, 1)
+
+        self._write(CODE.replace('/a', '/c'), mtime_ns=os.stat(self.path).st_mtime_ns + 10 ** 9)
+        self.assertEqual(files.parse(self.path)[0].target, 'http://example.com/c')
+        self.assertEqual(files.parsed, 2)
+
+    def test_on_disk(self):
+        ParsedFileCache.directory = os.path.join(self.tmp.name, 'cache')
+        ParsedFileCache().parse(self.path)
+
+        files = ParsedFileCache()
+        requests = files.parse(self.path)
+        self.assertEqual(files.parsed, 0)
+        self.assertEqual([(r.method, r.target) for r in requests],
+                         [('GET', 'http://example.com/a'), ('POST', 'http://example.com/b')])
+        self.assertEqual(requests[1].tail.message_body.messages[0].content, '{"b": 1}')
+
+    def test_parser_version_invalidates(self):
+        ParsedFileCache.directory = os.path.join(self.tmp.name, 'cache')
+        ParsedFileCache().parse(self.path)
+
+        with mock.patch.object(cache, '_parser_version', lambda: 'changed grammar'):
+            files = ParsedFileCache()
+            files.parse(self.path)
+        self.assertEqual(files.parsed, 1)
+
+    def test_corrupt_entry(self):
+        ParsedFileCache.directory = os.path.join(self.tmp.name, 'cache')
+        ParsedFileCache().parse(self.path)
+        for root, _, names in os.walk(ParsedFileCache.directory):
+            for name in names:
+                with open(os.path.join(root, name), 'wb') as f:
+                    f.write(b'\x80')
+
+        files = ParsedFileCache()
+        self.assertEqual(len(files.parse(self.path)), 2)
+        self.assertEqual(files.parsed, 1)
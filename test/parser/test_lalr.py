@@ -0,0 +1,69 @@
+import os
+import unittest
+
+from lark import LarkError
+
+from bogi.parser.main import Parser
+from bogi.parser.tail import TailParser
+from test.parser import test_parser, test_tail_parser
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), '../../examples')
+
+
+def _request_trees(requests):
+    return [(r.request_line, r.headers, r.separators, r.options, r.tail) for r in requests]
+
+
+class EquivalenceParser:
+    """
+    Parses with both the Earley and LALR parsers, failing the test if they don't produce identical requests.
+    """
+    def __init__(self, test_case):
+        self._test_case = test_case
+
+    def parse(self, code):
+        earley = Parser().parse(code)
+        lalr = Parser(parser='lalr').parse(code)
+        self._test_case.assertEqual(_request_trees(earley), _request_trees(lalr))
+        return lalr
+
+
+class EquivalenceTailParser:
+    def __init__(self, test_case, multipart_boundary=None):
+        self._test_case = test_case
+        self._multipart_boundary = multipart_boundary
+
+    def parse(self, code):
+        earley = TailParser(self._multipart_boundary).parse(code)
+        lalr = TailParser(self._multipart_boundary, parser='lalr').parse(code)
+        self._test_case.assertEqual(earley, lalr)
+        return lalr
+
+
+class LalrParserTests(test_parser.ParserTests):
+
+    def setUp(self):
+        self.parser = EquivalenceParser(self)
+
+
+class LalrTailParserTests(test_tail_parser.TailParserTests):
+
+    def tail_parser(self, multipart_boundary=None):
+        return EquivalenceTailParser(self, multipart_boundary)
+
+
+class LalrExamplesTests(unittest.TestCase):
+
+    def test_examples(self):
+        for fname in sorted(os.listdir(EXAMPLES_DIR)):
+            if not fname.endswith('.http'):
+                continue
+            with self.subTest(fname), open(os.path.join(EXAMPLES_DIR, fname), 'r') as f:
+                code = f.read()
+                try:
+                    earley = _request_trees(Parser().parse(code))
+                except LarkError:
+                    with self.assertRaises(LarkError):
+                        Parser(parser='lalr').parse(code)
+                    continue
+                self.assertEqual(earley, _request_trees(Parser(parser='lalr').parse(code)))
@@ -161,6 +161,22 @@ class ParserTests(unittest.TestCase):
         self.assertEqual(reqs[0].target, 'http://example.com/api/a/b/c')
         self.assertEqual(reqs[0].options, {'@no-redirect'})
 
+    def test_http_version(self):
+        reqs = self.parser.parse(dedent('''
+        GET http://example.com/a HTTP/2
+        ###
+        GET http://example.com/a?b=1
+          &c=2 HTTP/1.1
+        ###
+        GET http://example.com/a?b=HTTP/2
+        '''))
+
+        self.assertEqual([(r.target, r.http_version) for r in reqs], [
+            ('http://example.com/a', '2'),
+            ('http://example.com/a?b=1&c=2', '1.1'),
+            ('http://example.com/a?b=HTTP/2', None),
+        ])
+
     def test_simple_with_tail(self):
         reqs = self.parser.parse(dedent('''
         ### Post to API add
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from bogi.parser.main import Parser
+from bogi.parser.tail import TailParser
+from bogi.parser.util import LarkCache, build_lark
+
+
+class ParserCacheTests(unittest.TestCase):
+
+    def test_main_parser_built_once(self):
+        Parser().parse('GET http://example.com')
+        lark = Parser._lark_by_parser['earley']
+        Parser().parse('GET http://example.com/other')
+        self.assertIs(Parser._lark_by_parser['earley'], lark)
+
+    def test_tail_parser_by_boundary(self):
+        TailParser().parse('> ./script.js')
+        TailParser(multipart_boundary='abcd').parse('--abcd\nContent-Type: text/plain\n\nText\n--abcd--')
+        plain = TailParser._lark_by_boundary[('earley', None)]
+        multipart = TailParser._lark_by_boundary[('earley', 'abcd')]
+        self.assertIsNot(plain, multipart)
+
+        TailParser().parse('>STATUS 200')
+        self.assertIs(TailParser._lark_by_boundary[('earley', None)], plain)
+
+    def test_disk_cache(self):
+        grammar = 'start: WORD+\nWORD: /\\w+/\n%ignore " "'
+        with tempfile.TemporaryDirectory() as cache_dir:
+            LarkCache.directory = cache_dir
+            try:
+                build_lark(grammar, start='start', parser='lalr')
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+                lark = build_lark(grammar, start='start', parser='lalr')
+                self.assertEqual(len(lark.parse('foo bar').children), 2)
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+            finally:
+                LarkCache.directory = None
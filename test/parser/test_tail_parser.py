@@ -6,6 +6,9 @@ from bogi.parser.tail_transformer import MessageBody, ContentLine, InputFileRef,
 
 
 class TailParserTests(unittest.TestCase):
+    def tail_parser(self, multipart_boundary=None):
+        return TailParser(multipart_boundary)
+
     def test_content_lines(self):
         body = dedent('''
         {
@@ -13,7 +16,7 @@ class TailParserTests(unittest.TestCase):
             "param2": "value2"
         }''')
 
-        tail = TailParser().parse(body)
+        tail = self.tail_parser().parse(body)
 
         self.assertEqual(tail.message_body, MessageBody([
             ContentLine('{'),
@@ -27,7 +30,7 @@ class TailParserTests(unittest.TestCase):
         < body.json
         < /home/file''')
 
-        tail = TailParser().parse(body)
+        tail = self.tail_parser().parse(body)
         self.assertEqual(tail.message_body, MessageBody([
             InputFileRef('body.json'),
             InputFileRef('/home/file')
@@ -42,7 +45,7 @@ class TailParserTests(unittest.TestCase):
         < /home/file
         testing''')
 
-        tail = TailParser().parse(body)
+        tail = self.tail_parser().parse(body)
         self.assertEqual(tail.message_body, MessageBody([
             ContentLine('{'),
             ContentLine('    "key": "val"'),
@@ -64,7 +67,7 @@ class TailParserTests(unittest.TestCase):
         < ./input.txt
         --abcd--''')
 
-        tail = TailParser(multipart_boundary='abcd').parse(body)
+        tail = self.tail_parser(multipart_boundary='abcd').parse(body)
         self.assertEqual(tail.message_body, MessageBody([
             MultipartField(
                 headers=[Header(field='Content-Disposition', value='form-data; name="text"')],
@@ -82,26 +85,45 @@ class TailParserTests(unittest.TestCase):
         body = dedent('''
         > {% ''' + script + ''' %}''')
 
-        tail = TailParser().parse(body)
+        tail = self.tail_parser().parse(body)
         self.assertEqual(tail.response_handler, ResponseHandler(script=script.strip(), path=None, expected_status_code=None))
 
     def test_response_handler_path(self):
         body = dedent('''
         > ./script.js''')
 
-        tail = TailParser().parse(body)
+        tail = self.tail_parser().parse(body)
         self.assertEqual(tail.response_handler, ResponseHandler(script=None, path='./script.js', expected_status_code=None))
 
+    def test_python_response_handler_script(self):
+        body = dedent('''
+        > {% python
+            assert response.status == 200
+            client.global_.set('auth', response.body.json['token'])
+        %}''')
+
+        tail = self.tail_parser().parse(body)
+        self.assertEqual(tail.response_handler, ResponseHandler(
+            script="assert response.status == 200\nclient.global_.set('auth', response.body.json['token'])",
+            path=None, expected_status_code=None, language='python'))
+
+    def test_python_response_handler_path(self):
+        body = dedent('''
+        > ./script.py''')
+
+        tail = self.tail_parser().parse(body)
+        self.assertEqual(tail.response_handler.language, 'python')
+
     def test_response_status_code(self):
         body = dedent('''
         >STATUS 301''')
 
-        tail = TailParser().parse(body)
+        tail = self.tail_parser().parse(body)
         self.assertEqual(tail.response_handler, ResponseHandler(script=None, path=None, expected_status_code=301))
 
     def test_response_ref(self):
         body = dedent('''
         <> ./previous-response.200.json''')
 
-        tail = TailParser().parse(body)
+        tail = self.tail_parser().parse(body)
         self.assertEqual(tail.response_ref, ResponseReference(path='./previous-response.200.json'))
@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from bogi.async_runner import AsyncHttpRunner
+from bogi.http_runner import HttpRunner
+from bogi.parser.main import Parser
+from test.utils import dedent, serve, shutdown
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    delay = 0.2
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_GET(self):
+        with self.lock:
+            SlowHandler.in_flight += 1
+            SlowHandler.max_in_flight = max(SlowHandler.max_in_flight, SlowHandler.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            SlowHandler.in_flight -= 1
+
+        status = int(self.path.split('/')[-1]) if self.path.startswith('/status/') else 200
+        body = json.dumps({'path': self.path}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class AsyncHttpRunnerTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.url = serve(SlowHandler)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown(cls.server)
+
+    def setUp(self):
+        SlowHandler.max_in_flight = 0
+
+    def _runner(self, code):
+        return HttpRunner(Parser().parse(dedent(code).format(url=self.url)), ignore_headers=True)
+
+    def test_files_and_requests_run_concurrently(self):
+        code = '\n'.join('###\n// @no-cookie-jar\nGET {url}/' + str(i) for i in range(4))
+        runners = [self._runner(code), self._runner(code)]
+
+        start = time.perf_counter()
+        callbacks = AsyncHttpRunner(concurrency=8).run(runners)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([len(c.successes) for c in callbacks], [4, 4])
+        self.assertEqual(SlowHandler.max_in_flight, 8)
+        self.assertLess(elapsed, 8 * SlowHandler.delay)
+
+    def test_host_concurrency(self):
+        code = '\n'.join('###\n// @no-cookie-jar\nGET {url}/' + str(i) for i in range(4))
+
+        callbacks = AsyncHttpRunner(concurrency=8, host_concurrency=2).run([self._runner(code)])
+
+        self.assertEqual(len(callbacks[0].successes), 4)
+        self.assertEqual(SlowHandler.max_in_flight, 2)
+
+    def test_cookie_jar_requests_keep_order(self):
+        code = '\n'.join('###\nGET {url}/' + str(i) for i in range(3))
+
+        callbacks = AsyncHttpRunner(concurrency=8).run([self._runner(code)])
+
+        self.assertEqual([s.request.target for s in callbacks[0].successes],
+                         [self.url + '/' + str(i) for i in range(3)])
+        self.assertEqual(SlowHandler.max_in_flight, 1)
+
+    def test_status_failure_skips_dependents(self):
+        callbacks = AsyncHttpRunner(concurrency=8).run([self._runner('''
+        ### first
+        GET {url}/status/404
+
+        >STATUS 200
+        ###
+        GET {url}/a
+        ### second
+        GET {url}/b
+
+        <> first
+        ###
+        GET {url}/c
+
+        <> second
+        ''')])
+
+        self.assertEqual([f.error for f in callbacks[0].failures], [
+            'Expected status code 200, but got 404',
+            'Skipped, depends on failed request #1',
+            'Skipped, depends on failed request #3',
+        ])
+        self.assertEqual([s.request.target for s in callbacks[0].successes], [self.url + '/a'])
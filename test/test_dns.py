@@ -0,0 +1,125 @@
+import socket
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+from unittest import mock
+
+from bogi import dns
+from bogi.dns import DnsCache, dns_cache
+from bogi.http_runner import HttpRunner
+from bogi.parser.main import Parser
+from bogi.transport import Transport
+from test.utils import serve, shutdown
+
+
+class OkHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class DnsCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.lookups = []
+
+        def getaddrinfo(host, *args):
+            self.lookups.append(host)
+            if host.endswith('.invalid'):
+                raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', args[0]))]
+
+        patcher = mock.patch.object(dns.socket, 'getaddrinfo', getaddrinfo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _cache(self, ttl=60, negative_ttl=60):
+        cache = DnsCache()
+        cache.ttl, cache.negative_ttl = ttl, negative_ttl
+        return cache
+
+    def test_not_cached_by_default(self):
+        cache = DnsCache()
+        cache.getaddrinfo('example.com', 80)
+        cache.getaddrinfo('example.com', 80)
+        self.assertEqual(self.lookups, ['example.com', 'example.com'])
+
+    def test_cached_until_expired(self):
+        cache = self._cache(ttl=0.05)
+        addresses = cache.getaddrinfo('example.com', 80)
+        self.assertEqual(cache.getaddrinfo('example.com', 80), addresses)
+        self.assertEqual(self.lookups, ['example.com'])
+
+        time.sleep(0.06)
+        cache.getaddrinfo('example.com', 80)
+        self.assertEqual(self.lookups, ['example.com', 'example.com'])
+        self.assertEqual(cache.counts['hits'], 1)
+
+    def test_failures_cached(self):
+        cache = self._cache()
+        for _ in range(2):
+            with self.assertRaises(socket.gaierror):
+                cache.getaddrinfo('missing.invalid', 80)
+        self.assertEqual(self.lookups, ['missing.invalid'])
+        self.assertEqual(cache.counts['failed'], 1)
+
+    def test_prefetch(self):
+        cache = self._cache()
+        failed = cache.prefetch(['http://example.com/a', 'http://example.com/b', 'https://example.com:8443/',
+                                 'http://missing.invalid/'])
+
+        self.assertEqual(failed, 1)
+        self.assertEqual(sorted(self.lookups), ['example.com', 'example.com', 'missing.invalid'])
+        cache.getaddrinfo('example.com', 80)
+        cache.getaddrinfo('example.com', 8443)
+        self.assertEqual(len(self.lookups), 3)
+
+    def test_locks_replaced_in_forked_process(self):
+        cache = self._cache()
+        cache.getaddrinfo('example.com', 80)
+        # as if another thread held the lock when the process forked
+        cache._lock.acquire()
+        cache._pid = -1
+        self.assertEqual(cache.getaddrinfo('example.com', 80)[0][4], ('127.0.0.1', 80))
+        self.assertEqual(cache.counts['hits'], 1)
+
+
+class DnsCacheRequestTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, url = serve(OkHandler)
+        cls.url = url.replace('127.0.0.1', 'localhost')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown(cls.server)
+
+    def setUp(self):
+        DnsCache.ttl = 60
+        dns_cache.clear()
+
+    def tearDown(self):
+        DnsCache.ttl = 0
+        dns_cache.clear()
+
+    def _run(self):
+        # a new connection for every run
+        Transport.close()
+        with HttpRunner(Parser().parse(f'GET {self.url}/\n'), ignore_headers=True) as runner:
+            return runner.run().successes[0]
+
+    def test_new_connections_use_cached_addresses(self):
+        lookups = dns_cache.counts['lookups']
+        self._run()
+        hits = dns_cache.counts['hits']
+        second = self._run()
+
+        self.assertEqual(dns_cache.counts['lookups'], lookups + 1)
+        self.assertEqual(dns_cache.counts['hits'], hits + 1)
+        self.assertGreater(second.timings.connect, 0)
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from elasticsearch import Elasticsearch
+
+from bogi.es_reporter import EsReporter
+from test.utils import serve, shutdown
+
+
+class MockEsHandler(BaseHTTPRequestHandler):
+    """
+    Answers like an Elasticsearch node, keeping the documents sent to `_bulk` in `server.docs`.
+    """
+
+    def do_GET(self):
+        self._respond({'version': {'number': '7.17.0', 'build_flavor': 'default'}, 'tagline': 'You Know, for Search'})
+
+    def do_POST(self):
+        lines = self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8').splitlines()
+        docs = [json.loads(line) for line in lines[1::2]]
+        with self.server.lock:
+            self.server.docs.extend(docs)
+            self.server.bulks += 1
+        self._respond({'took': 1, 'errors': False, 'items': [{'index': {'status': 201}} for _ in docs]})
+
+    def _respond(self, body):
+        body = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('X-Elastic-Product', 'Elasticsearch')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def actions(count, start=0):
+    return [{'_index': 'bogi-reports', '_source': {'n': n}} for n in range(start, start + count)]
+
+
+class EsReporterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server, self.url = serve(MockEsHandler)
+        self.server.lock = threading.Lock()
+        self.server.docs = []
+        self.server.bulks = 0
+
+    def tearDown(self):
+        shutdown(self.server)
+
+    def test_batches(self):
+        reporter = EsReporter(Elasticsearch(hosts=[self.url]), batch_size=2, flush_interval=60)
+        reporter.report(actions(5))
+        reporter.close()
+
+        self.assertEqual(self.server.bulks, 3)
+        self.assertEqual([d['n'] for d in self.server.docs], [0, 1, 2, 3, 4])
+        self.assertEqual(reporter.indexed, 5)
+
+    def test_flush_interval(self):
+        reporter = EsReporter(Elasticsearch(hosts=[self.url]), batch_size=100, flush_interval=0.05)
+        reporter.report(actions(1))
+        for _ in range(100):
+            if self.server.docs:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(self.server.docs), 1)
+        reporter.close()
+
+    def test_spools_while_unreachable(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            spool_path = os.path.join(tmp, 'spool.jsonl')
+            unreachable = Elasticsearch(hosts=['http://127.0.0.1:1'], max_retries=0)
+            reporter = EsReporter(unreachable, max_retries=1, backoff=0.01, spool_path=spool_path)
+            reporter.report(actions(3))
+            reporter.close()
+            self.assertEqual(reporter.spooled, 3)
+
+            reporter = EsReporter(Elasticsearch(hosts=[self.url]), spool_path=spool_path)
+            reporter.report(actions(1, start=3))
+            reporter.close()
+            self.assertEqual(sorted(d['n'] for d in self.server.docs), [0, 1, 2, 3])
+            self.assertFalse(os.path.exists(spool_path))
@@ -0,0 +1,88 @@
+import random
+import unittest
+
+from bogi.callbacks import HistogramCallback
+from bogi.histogram import LatencyHistogram, LatencyHistograms
+from bogi import http_runner
+from bogi.logger import logger
+from bogi.parser.main import Parser
+from bogi.workers import RequestSummary
+from test.test_http_runner import JsonHandler
+from test.utils import dedent, serve, shutdown
+
+
+class LatencyHistogramTests(unittest.TestCase):
+
+    def test_percentiles(self):
+        h = LatencyHistogram()
+        values = list(range(1, 1001))
+        random.Random(1).shuffle(values)
+        for v in values:
+            h.record(v)
+
+        self.assertEqual(h.count, 1000)
+        self.assertEqual(h.max, 1000)
+        for p, expected in [(50, 500), (90, 900), (99, 990), (100, 1000)]:
+            self.assertAlmostEqual(h.percentile(p), expected, delta=expected * h.precision)
+
+    def test_bounded_memory(self):
+        h = LatencyHistogram()
+        rnd = random.Random(1)
+        for _ in range(100000):
+            h.record(rnd.uniform(1, 1000))
+        self.assertLess(len(h.buckets), 800)
+
+    def test_merge(self):
+        a, b = LatencyHistogram(), LatencyHistogram()
+        for v in range(1, 51):
+            a.record(v)
+        for v in range(51, 101):
+            b.record(v)
+        a.merge(b)
+        self.assertEqual(a.count, 100)
+        self.assertAlmostEqual(a.percentile(90), 90, delta=1)
+
+    def test_empty(self):
+        self.assertIsNone(LatencyHistogram().percentile(50))
+
+
+class HistogramCallbackTests(unittest.TestCase):
+
+    def test_keeps_histograms_instead_of_successes(self):
+        callback = HistogramCallback(logger)
+        first = RequestSummary(id='first', method='GET', target='http://a.test/x')
+        other = RequestSummary(id=None, method='GET', target='http://a.test/y')
+        for ms in [10, 20, 30]:
+            callback.success(http_runner.TestSuccess(request=first, latency=ms, response_time=ms))
+        callback.failure(http_runner.TestFailure(request=other, error='down', response_time=-1))
+
+        self.assertEqual(callback.successes, [])
+        self.assertEqual(len(callback.failures), 1)
+
+        merged = LatencyHistograms()
+        merged.merge(callback.histograms)
+        rows = {(r.kind, r.key): r for r in merged.rows()}
+        self.assertEqual(list(rows), [('id', 'first'), ('url', 'GET http://a.test/x'),
+                                      ('url', 'GET http://a.test/y'), ('host', 'a.test')])
+        self.assertEqual(rows[('host', 'a.test')].count, 3)
+        self.assertEqual(rows[('host', 'a.test')].failures, 1)
+        self.assertEqual(rows[('url', 'GET http://a.test/y')].p50, None)
+        self.assertAlmostEqual(rows[('id', 'first')].p50, 20, delta=0.2)
+
+    def test_failed_handler_recorded_once(self):
+        server, url = serve(JsonHandler)
+        try:
+            requests = Parser().parse(dedent('''
+            GET {url}/a
+
+            > {{% python
+            assert False, 'failed'
+            %}}
+            ''').format(url=url))
+            with http_runner.HttpRunner(requests, ignore_headers=True, callback=HistogramCallback(logger)) as runner:
+                callback = runner.run()
+        finally:
+            shutdown(server)
+
+        row = next(r for r in callback.histograms.rows() if r.kind == 'url')
+        self.assertEqual((row.count, row.failures), (1, 1))
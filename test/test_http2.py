@@ -0,0 +1,70 @@
+import unittest
+
+from bogi.async_runner import AsyncHttpRunner
+from bogi.http2 import http2_available
+from bogi.http_runner import HttpRunner
+from bogi.parser.main import Parser
+from test.http2_server import Server
+from test.utils import dedent
+
+
+@unittest.skipUnless(http2_available(), 'needs httpx with HTTP/2 support')
+class Http2Tests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = Server(delay=0.1)
+        cls.url = cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def tearDown(self):
+        HttpRunner.http2 = False
+
+    def _runner(self, code):
+        return HttpRunner(Parser().parse(dedent(code).format(url=self.url)), ignore_headers=True)
+
+    def test_request_line_version(self):
+        with self._runner('''
+        GET {url}/a HTTP/2
+
+        > {{%
+            client.assert(response.body.json['protocol'] === 'HTTP/2', response.body.json['protocol']);
+        %}}
+        ''') as runner:
+            callback = runner.run()
+
+        self.assertEqual(callback.failures, [])
+        self.assertEqual(len(callback.successes), 1)
+
+    def test_request_line_version_overrides_option(self):
+        HttpRunner.http2 = True
+        with self._runner('''
+        GET {url}/a HTTP/1.1
+
+        > {{%
+            client.assert(response.body.json['protocol'] === 'HTTP/1.1', response.body.json['protocol']);
+        %}}
+        ''') as runner:
+            callback = runner.run()
+
+        self.assertEqual(callback.failures, [])
+
+    def test_concurrent_requests_share_a_connection(self):
+        HttpRunner.http2 = True
+        # warms up the connection
+        with self._runner('GET {url}/warm') as runner:
+            runner.run()
+        connections = self.server.connections
+
+        code = '\n'.join('###\n// @no-cookie-jar\nGET {url}/' + str(i) for i in range(10))
+        runner = self._runner(code)
+        callbacks = AsyncHttpRunner(concurrency=10).run([runner])
+
+        self.assertEqual(len(callbacks[0].successes), 10)
+        self.assertEqual(callbacks[0].failures, [])
+        self.assertEqual(self.server.connections, connections)
+        # sent at once rather than one after the other
+        self.assertLess(runner.runtime, 5 * self.server.delay)
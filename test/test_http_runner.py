@@ -0,0 +1,112 @@
+import json
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from bogi.http_runner import HttpRunner
+from bogi.parser.main import Parser
+from test.utils import dedent, serve, shutdown
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    """
+    Responds with the request path as JSON, `/status/<code>` responds with the given status code.
+    """
+
+    def do_GET(self):
+        status = int(self.path.split('/')[-1]) if self.path.startswith('/status/') else 200
+        body = json.dumps({'path': self.path.split('?')[0]}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpRunnerTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.url = serve(JsonHandler)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown(cls.server)
+
+    def _run(self, code):
+        requests = Parser().parse(dedent(code).format(url=self.url))
+        with HttpRunner(requests, ignore_headers=True) as runner:
+            return runner.run()
+
+    def test_status_failure_skips_dependents(self):
+        callback = self._run('''
+        ### first
+        GET {url}/status/404
+
+        >STATUS 200
+        ###
+        GET {url}/a
+        ###
+        GET {url}/b
+
+        <> first
+        ''')
+
+        # sharing the cookie jar doesn't skip requests, referencing the failed response does
+        self.assertEqual([f.error for f in callback.failures], [
+            'Expected status code 200, but got 404',
+            'Skipped, depends on failed request #1',
+        ])
+        self.assertEqual([s.request.target for s in callback.successes], [self.url + '/a'])
+
+    def test_response_reference(self):
+        callback = self._run('''
+        ### first
+        GET {url}/a
+        ###
+        GET {url}/a?other
+
+        <> first
+        ###
+        GET {url}/b
+
+        <> first
+        ''')
+
+        self.assertEqual(len(callback.successes), 2)
+        self.assertEqual([f.request.target for f in callback.failures], [self.url + '/b'])
+        self.assertEqual(callback.failures[0].error, 'Response body mismatch.\n$.path: "/b" != "/a"')
+
+    def test_response_reference_ignored_paths(self):
+        callback = self._run('''
+        ### first
+        GET {url}/a
+        ###
+        // @ignore $.path
+        GET {url}/b
+
+        <> first
+        ''')
+
+        self.assertEqual(callback.failures, [])
+
+    def test_python_response_handler(self):
+        callback = self._run('''
+        ###
+        GET {url}/a
+
+        > {{% python
+        assert response.body.json['path'] == '/a'
+        %}}
+        ###
+        GET {url}/b
+
+        > {{% python
+        client.assert_(response.status == 201, 'Expected 201')
+        %}}
+        ''')
+
+        self.assertEqual([f.error for f in callback.failures], ['Expected 201'])
+        self.assertEqual(len(callback.handler_times['python']), 2)
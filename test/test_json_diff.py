@@ -0,0 +1,77 @@
+import unittest
+
+from bogi.json_diff import WILDCARD, Difference, JsonDiff, describe, format_path, parse_path, text_diff
+
+
+class JsonPathTests(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(parse_path('$'), ())
+        self.assertEqual(parse_path("$.items[0].id['created at']"), ('items', 0, 'id', 'created at'))
+        self.assertEqual(parse_path('$.items[*].*'), ('items', WILDCARD, WILDCARD))
+        with self.assertRaises(ValueError):
+            parse_path('items.id')
+        with self.assertRaises(ValueError):
+            parse_path('$.items[')
+
+    def test_format(self):
+        self.assertEqual(format_path(('items', 0, 'created at')), "$.items[0]['created at']")
+
+
+class JsonDiffTests(unittest.TestCase):
+
+    def test_equal(self):
+        doc = {'a': [1, 2, {'b': None}], 'c': 'd'}
+        self.assertEqual(JsonDiff().diff(doc, {'c': 'd', 'a': [1, 2, {'b': None}]}), ([], False))
+
+    def test_differences(self):
+        left = {'a': 1, 'b': {'c': [1, 2, 3]}, 'd': 'x', 'only_left': True}
+        right = {'a': 2, 'b': {'c': [1, 5]}, 'd': 1, 'only_right': None}
+        differences, truncated = JsonDiff().diff(left, right)
+
+        self.assertFalse(truncated)
+        self.assertEqual(sorted(differences), sorted([
+            Difference('$.a', 'changed', 1, 2),
+            Difference('$.b.c[1]', 'changed', 2, 5),
+            Difference('$.b.c[2]', 'added', 3, None),
+            Difference('$.d', 'type', 'x', 1),
+            Difference('$.only_left', 'added', True, None),
+            Difference('$.only_right', 'removed', None, None),
+        ]))
+
+    def test_types(self):
+        self.assertEqual(JsonDiff().diff({'a': True}, {'a': 1}), ([Difference('$.a', 'type', True, 1)], False))
+        self.assertEqual(JsonDiff().diff([0, 1], [False, 1.0]),
+                         ([Difference('$[0]', 'type', 0, False), Difference('$[1]', 'changed', 1, 1.0)], False))
+        self.assertEqual(JsonDiff().diff({'a': {'b': [1]}}, {'a': {'b': [True]}}),
+                         ([Difference('$.a.b[0]', 'type', 1, True)], False))
+
+    def test_ignore(self):
+        left = {'id': 1, 'items': [{'ts': 1, 'v': 1}, {'ts': 2, 'v': 2}], 'meta': {'ts': 5}}
+        right = {'id': 2, 'items': [{'ts': 3, 'v': 1}, {'ts': 4, 'v': 3}], 'meta': {}}
+        differences, _ = JsonDiff(ignore=['$.id', '$.items[*].ts', '$.meta.ts']).diff(left, right)
+        self.assertEqual(differences, [Difference('$.items[1].v', 'changed', 2, 3)])
+
+    def test_limit(self):
+        left, right = list(range(100)), list(range(1, 101))
+        differences, truncated = JsonDiff(limit=5).diff(left, right)
+        self.assertTrue(truncated)
+        self.assertEqual([d.path for d in differences], [f'$[{i}]' for i in range(5)])
+        self.assertTrue(describe(differences, truncated).endswith('... stopped after 5 differences'))
+
+    def test_describe(self):
+        self.assertEqual(describe([Difference('$.a', 'changed', 'x', 'y'), Difference('$.b', 'removed', None, [1])],
+                                  False),
+                         '$.a: "x" != "y"\n$.b: only in referenced response: [1]')
+
+
+class TextDiffTests(unittest.TestCase):
+
+    def test_changed_lines_only(self):
+        left = ''.join(f'line {i}\n' for i in range(100))
+        right = left.replace('line 50\n', 'line fifty\n')
+        self.assertEqual(text_diff(left, right), '@@ from line 51 @@\n- line 50\n+ line fifty\n')
+
+    def test_limit(self):
+        diff = text_diff('a\nb\nc\n', 'x\ny\nz\n', limit=2)
+        self.assertEqual(diff.splitlines()[-1], '... stopped after 2 lines')
@@ -0,0 +1,119 @@
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from bogi.load import LoadGenerator
+from bogi.parser.main import Parser
+from test.test_http_runner import JsonHandler
+from test.utils import dedent, serve, shutdown
+
+
+class StallHandler(BaseHTTPRequestHandler):
+    """
+    Responds right away, except to /stall which takes 300ms.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/stall':
+            time.sleep(0.3)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class LoadGeneratorTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.url = serve(JsonHandler)
+        cls.stall_server, cls.stall_url = serve(StallHandler)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown(cls.server)
+        shutdown(cls.stall_server)
+
+    def _files(self, url, code):
+        return [('load.http', Parser().parse(dedent(code).format(url=url)))]
+
+    def test_constant_rate(self):
+        files = self._files(self.url, '''
+        ### first
+        GET {url}/a
+        ###
+        GET {url}/b
+
+        <> first
+        ''')
+        load = LoadGenerator(files, None, duration=0.5, rate=40).run()
+
+        self.assertEqual(load.sent, 20)
+        self.assertEqual(load.error_rate, 0)
+        self.assertAlmostEqual(load.throughput, 40, delta=8)
+
+    def test_latency_counts_time_spent_queued(self):
+        files = self._files(self.stall_url, '''
+        GET {url}/stall
+        ###
+        GET {url}/fast
+        ###
+        GET {url}/fast
+        ###
+        GET {url}/fast
+        ''')
+        # requests due while the stalled one is in flight wait for it
+        load = LoadGenerator(files, None, duration=0.2, rate=40, max_in_flight=1).run()
+
+        self.assertEqual(load.sent, 8)
+        self.assertLess(load.service_time.percentile(50), 50)
+        self.assertGreater(load.latency.percentile(50), 200)
+
+    def test_users(self):
+        files = self._files(self.url, '''
+        GET {url}/a
+        ###
+        GET {url}/status/500
+
+        >STATUS 200
+        ''')
+        load = LoadGenerator(files, None, duration=0.3, users=2).run()
+
+        self.assertGreater(load.sent, 10)
+        self.assertAlmostEqual(load.error_rate, 0.5, delta=0.1)
+        self.assertEqual(list(load.callback.errors), ['Expected status code 200, but got 500'])
+        failures = {row.key: row.failures for row in load.latencies.rows() if row.kind == 'url'}
+        self.assertGreater(failures['GET ' + self.url + '/status/500'], 0)
+        self.assertEqual(failures['GET ' + self.url + '/a'], 0)
+
+    def test_handler_failures(self):
+        files = self._files(self.url, '''
+        GET {url}/a
+
+        > {{% python
+        assert False, 'failed'
+        %}}
+        ''')
+        load = LoadGenerator(files, None, duration=0.2, rate=40).run()
+
+        self.assertEqual(load.failed, load.sent)
+        self.assertEqual(load.error_rate, 1.0)
+
+    def test_corrected_for_stalls(self):
+        files = self._files(self.stall_url, '''
+        GET {url}/fast
+        ###
+        GET {url}/fast
+        ###
+        GET {url}/fast
+        ###
+        GET {url}/stall
+        ''')
+        load = LoadGenerator(files, None, duration=0.35, users=1).run()
+
+        # the user sent a handful of requests while stalled, the correction adds what it would have seen
+        self.assertGreater(load.latency.count, load.sent * 2)
+        self.assertGreater(load.latency.percentile(90), 100)
@@ -0,0 +1,78 @@
+import pickle
+import unittest
+from urllib.request import urlopen
+
+from bogi.http_runner import HttpRunner
+from bogi.metrics import MetricsRegistry, MetricsServer, RequestMetrics
+from bogi.parser.main import Parser
+from test.test_http_runner import JsonHandler
+from test.utils import dedent, serve, shutdown
+
+
+class MetricsTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.url = serve(JsonHandler)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown(cls.server)
+
+    def _run(self, code):
+        requests = Parser().parse(dedent(code).format(url=self.url))
+        with HttpRunner(requests, ignore_headers=True) as runner:
+            runner.callback.metrics = RequestMetrics()
+            return runner.run()
+
+    def test_scrape(self):
+        callback = self._run('''
+        ### home
+        GET {url}/a
+        ###
+        GET {url}/status/404
+
+        >STATUS 200
+        ''')
+        registry = MetricsRegistry()
+        # metrics are sent back from workers
+        registry.merge('/tests/checks.http', pickle.loads(pickle.dumps(callback.metrics)), runtime=0.5)
+        registry.merge('/tests/checks.http', callback.metrics, runtime=0.25)
+
+        server = MetricsServer(registry, 0, host='127.0.0.1')
+        try:
+            with urlopen(f'http://127.0.0.1:{server.port}/metrics') as resp:
+                self.assertTrue(resp.headers['Content-Type'].startswith('text/plain; version=0.0.4'))
+                lines = resp.read().decode('utf-8').splitlines()
+        finally:
+            server.close()
+
+        self.assertIn('bogi_checks_total{file="checks.http",request_id="home",method="GET",status_code="200",'
+                      'result="success"} 2', lines)
+        self.assertIn(f'bogi_checks_total{{file="checks.http",request_id="{self.url}/status/404",method="GET",'
+                      f'status_code="404",result="failure"}} 2', lines)
+        self.assertIn('bogi_response_time_seconds_bucket{file="checks.http",request_id="home",method="GET",'
+                      'status_code="200",le="+Inf"} 2', lines)
+        self.assertIn('bogi_response_time_seconds_count{file="checks.http",request_id="home",method="GET",'
+                      'status_code="200"} 2', lines)
+        self.assertIn('bogi_file_runs_total{file="checks.http"} 2', lines)
+        self.assertIn('bogi_file_runtime_seconds{file="checks.http"} 0.25', lines)
+
+    def test_failed_handler_counted_once(self):
+        callback = self._run('''
+        ### checked
+        GET {url}/a
+
+        > {{% python
+        assert False, 'failed'
+        %}}
+        ''')
+        registry = MetricsRegistry()
+        registry.merge('/tests/checks.http', callback.metrics, runtime=0.5)
+
+        lines = [line for line in registry.render().splitlines() if 'request_id="checked"' in line]
+        self.assertIn('bogi_checks_total{file="checks.http",request_id="checked",method="GET",status_code="200",'
+                      'result="failure"} 1', lines)
+        self.assertNotIn('result="success"', '\n'.join(lines))
+        self.assertIn('bogi_response_time_seconds_count{file="checks.http",request_id="checked",method="GET",'
+                      'status_code="200"} 1', lines)
@@ -0,0 +1,75 @@
+import unittest
+
+from bogi.parser.main import Parser
+from bogi.request_graph import RequestGraph
+from test.utils import dedent
+
+
+class RequestGraphTests(unittest.TestCase):
+
+    def _graph(self, code):
+        return RequestGraph(Parser().parse(dedent(code)))
+
+    def test_dependencies(self):
+        graph = self._graph('''
+        ### first
+        GET http://localhost/a
+        ###
+        // @no-cookie-jar
+        GET http://localhost/b
+        ###
+        GET http://example.com/c
+        ###
+        // @no-cookie-jar
+        GET http://localhost/d
+
+        <> first
+        ###
+        // @no-cookie-jar
+        GET http://localhost/e?token={{token}}
+        ###
+        GET http://localhost/f
+        ''')
+
+        self.assertEqual([graph.depends_on(i) for i in range(6)], [set(), set(), set(), {0}, set(), {0}])
+        # sharing the cookie jar only orders requests
+        self.assertEqual([graph.requires(i) for i in range(6)], [set(), set(), set(), {0}, set(), set()])
+
+    def test_dependencies_globals(self):
+        graph = self._graph('''
+        ###
+        // @no-cookie-jar
+        GET http://localhost/a
+
+        > {% client.global.set("token", response.body.json.token); %}
+        ###
+        // @no-cookie-jar
+        GET http://localhost/b
+        ###
+        // @no-cookie-jar
+        GET http://localhost/c
+        Authorization: Bearer {{token}}
+        ###
+        // @no-cookie-jar
+        GET http://localhost/d?token={{token}}
+        ''')
+
+        self.assertEqual([graph.depends_on(i) for i in range(4)], [set(), set(), {0}, {2}])
+        self.assertEqual([graph.requires(i) for i in range(4)], [set(), set(), {0}, {2}])
+
+    def test_str(self):
+        graph = self._graph('''
+        ### first
+        GET http://localhost/a
+        ###
+        GET http://localhost/b
+
+        <> first
+        ''')
+
+        self.assertEqual(str(graph), dedent('''
+        #1 GET http://localhost/a (first)
+        #2 GET http://localhost/b
+        \t<- #1: references response "first"
+        \t<- #1: shares cookie jar for "localhost"
+        ''').strip())
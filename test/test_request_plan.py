@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from bogi.http_runner import HttpRunner
+from bogi.parser.main import Parser
+from bogi.request_plan import CHUNK_SIZE, BodyFile, RequestPlan
+from test.utils import dedent, serve, shutdown
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """
+    Responds with the request body and Content-Type as JSON.
+    """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        echo = json.dumps({'body': body.decode('utf-8'), 'content_type': self.headers['Content-Type']})
+        echo = echo.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(echo)))
+        self.end_headers()
+        self.wfile.write(echo)
+
+    def do_PUT(self):
+        # hashes the body as it's received, reporting whether it was chunked
+        sha = hashlib.sha256()
+        remaining = int(self.headers.get('Content-Length', 0))
+        while remaining:
+            chunk = self.rfile.read(min(remaining, 65536))
+            sha.update(chunk)
+            remaining -= len(chunk)
+        echo = json.dumps({'sha256': sha.hexdigest(), 'length': self.headers.get('Content-Length'),
+                           'transfer_encoding': self.headers.get('Transfer-Encoding')}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(echo)))
+        self.end_headers()
+        self.wfile.write(echo)
+
+    def log_message(self, *args):
+        pass
+
+
+class RequestPlanTests(unittest.TestCase):
+
+    def _compile(self, code):
+        return RequestPlan.compile(Parser().parse(dedent(code))[0])
+
+    def test_compile(self):
+        plan = self._compile('''
+        // @no-redirect
+        POST /api/item
+        Host: http://example.com
+        Content-Type: text/plain; charset=latin-1
+
+        café
+        ''')
+
+        self.assertEqual(plan.method, 'POST')
+        self.assertEqual(plan.url, 'http://example.com/api/item')
+        self.assertEqual(plan.host, 'example.com')
+        self.assertEqual(plan.headers['Content-Type'], 'text/plain; charset=latin-1')
+        self.assertEqual(plan.body(), 'café'.encode('latin-1'))
+        self.assertFalse(plan.allow_redirects)
+        self.assertTrue(plan.cookie_jar)
+
+    def test_http2(self):
+        self.assertIsNone(self._compile('GET http://example.com/\n').http2)
+        self.assertTrue(self._compile('GET http://example.com/ HTTP/2\n').http2)
+        self.assertTrue(self._compile('GET http://example.com/ HTTP/2.0\n').http2)
+        self.assertFalse(self._compile('GET http://example.com/ HTTP/1.1\n').http2)
+
+    def test_immutable(self):
+        plan = self._compile('GET http://example.com/\n')
+        self.assertIsNone(plan.body())
+        with self.assertRaises(AttributeError):
+            plan.url = 'http://other.com/'
+        with self.assertRaises(TypeError):
+            plan.headers['Accept'] = '*/*'
+
+    def test_body_files_read_on_send(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'body.json')
+            plan = self._compile(f'''
+            POST http://example.com/
+
+            {{"a":
+            < {path}
+            }}
+            ''')
+            self.assertEqual(plan.body_parts[1], BodyFile(path))
+
+            for content in ['1', '2']:
+                with open(path, 'w') as f:
+                    f.write(content)
+                body = plan.body()
+                self.assertEqual(len(body), 7)
+                self.assertEqual(b''.join(body), b'{"a":' + content.encode('utf-8') + b'}')
+
+    def test_plan_reused(self):
+        server, url = serve(EchoHandler)
+        try:
+            requests = Parser().parse(dedent('''
+            POST {url}/
+            Content-Type: application/json
+
+            {{"a": 1}}
+            ''').format(url=url))
+            for _ in range(2):
+                with HttpRunner(requests, ignore_headers=True) as runner:
+                    callback = runner.run()
+                self.assertEqual(callback.failures, [])
+            plan = requests[0].plan
+
+            with HttpRunner(requests, ignore_headers=True) as runner:
+                resp = runner._execute_request(requests[0])
+            self.assertIs(requests[0].plan, plan)
+            self.assertEqual(resp.json(), {'body': '{"a": 1}', 'content_type': 'application/json'})
+        finally:
+            shutdown(server)
+
+    def test_file_streamed(self):
+        server, url = serve(EchoHandler)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'upload.bin')
+                content = os.urandom(CHUNK_SIZE * 5 + 123)
+                with open(path, 'wb') as f:
+                    f.write(content)
+                requests = Parser().parse(dedent(f'''
+                PUT {url}/upload
+                Content-Type: application/octet-stream
+
+                < {path}
+                '''))
+
+                body = RequestPlan.compile(requests[0]).body()
+                self.assertEqual(len(body), len(content))
+                self.assertTrue(all(len(chunk) <= CHUNK_SIZE for chunk in body))
+
+                with HttpRunner(requests, ignore_headers=True) as runner:
+                    resp = runner._execute_request(requests[0])
+            self.assertEqual(resp.json(), {'sha256': hashlib.sha256(content).hexdigest(),
+                                           'length': str(len(content)), 'transfer_encoding': None})
+        finally:
+            shutdown(server)
+
+    def test_multipart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'input.txt')
+            with open(path, 'wb') as f:
+                f.write(b'file\ncontent')
+            plan = self._compile(f'''
+            POST http://example.com/upload
+            Content-Type: multipart/form-data; boundary=abcd
+
+            --abcd
+            Content-Disposition: form-data; name="text"
+
+            line 1
+            line 2
+            --abcd
+            Content-Disposition: form-data; name="file"; filename="input.txt"
+            Content-Type: text/plain
+
+            < {path}
+            --abcd--
+            ''')
+            body = plan.body()
+            expected = (b'--abcd\r\n'
+                        b'Content-Disposition: form-data; name="text"\r\n'
+                        b'\r\n'
+                        b'line 1\nline 2\r\n'
+                        b'--abcd\r\n'
+                        b'Content-Disposition: form-data; name="file"; filename="input.txt"\r\n'
+                        b'Content-Type: text/plain\r\n'
+                        b'\r\n'
+                        b'file\ncontent\r\n'
+                        b'--abcd--\r\n')
+            self.assertEqual(b''.join(body), expected)
+            self.assertEqual(len(body), len(expected))
+
+    def test_multipart_file_streamed(self):
+        server, url = serve(EchoHandler)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'upload.bin')
+                content = os.urandom(CHUNK_SIZE * 5 + 123)
+                with open(path, 'wb') as f:
+                    f.write(content)
+                requests = Parser().parse(dedent(f'''
+                PUT {url}/upload
+                Content-Type: multipart/form-data; boundary=xyz
+
+                --xyz
+                Content-Disposition: form-data; name="file"; filename="upload.bin"
+
+                < {path}
+                --xyz--
+                '''))
+
+                body = RequestPlan.compile(requests[0]).body()
+                self.assertTrue(all(len(chunk) <= CHUNK_SIZE for chunk in body))
+                with HttpRunner(requests, ignore_headers=True) as runner:
+                    resp = runner._execute_request(requests[0])
+
+            expected = (b'--xyz\r\nContent-Disposition: form-data; name="file"; filename="upload.bin"\r\n\r\n' +
+                        content + b'\r\n--xyz--\r\n')
+            self.assertEqual(resp.json(), {'sha256': hashlib.sha256(expected).hexdigest(),
+                                           'length': str(len(expected)), 'transfer_encoding': None})
+        finally:
+            shutdown(server)
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from bogi.http_runner import HttpRunner
+from bogi.parser.main import Parser
+from bogi.response_store import ResponseStore, body_digest
+from bogi.suite import run_files
+from test.test_http_runner import JsonHandler
+from test.utils import dedent, serve, shutdown
+
+CODE = '''
+### first
+GET {url}/a
+###
+GET {url}/a
+
+<> first
+###
+GET {url}/a
+
+<> first
+### unreferenced
+GET {url}/b
+'''
+
+
+def response(content, status_code=200):
+    return SimpleNamespace(status_code=status_code, headers={}, content=content)
+
+
+class ResponseStoreTests(unittest.TestCase):
+
+    def tearDown(self):
+        ResponseStore.spill_directory = None
+        ResponseStore.memory_limit = 1024 * 1024
+
+    def test_kept_until_references_compared(self):
+        store = ResponseStore(Parser().parse(dedent(CODE).format(url='http://example.com')))
+        store.put('first', response(b'{"a": 1}'))
+        store.put('unreferenced', response(b'{"b": 1}'))
+
+        self.assertEqual(store.ids, ['first', 'unreferenced'])
+        self.assertNotIn('unreferenced', store)
+        self.assertEqual(store.get('first').digest, body_digest(b'{"a": 1}'))
+
+        store.release('first')
+        self.assertIn('first', store)
+        store.release('first')
+        self.assertNotIn('first', store)
+
+    def test_spilled_to_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ResponseStore.spill_directory = tmp
+            ResponseStore.memory_limit = 4
+            store = ResponseStore(Parser().parse(dedent(CODE).format(url='http://example.com')))
+            store.put('first', response(b'{"a": 1}'))
+
+            stored = store.get('first')
+            self.assertIsNone(stored.content)
+            self.assertEqual(store.content(stored), b'{"a": 1}')
+
+            store.close()
+            self.assertEqual(os.listdir(tmp), [])
+
+    def test_spilled_to_temporary_directory(self):
+        ResponseStore.memory_limit = 4
+        store = ResponseStore(Parser().parse(dedent(CODE).format(url='http://example.com')))
+        store.put('first', response(b'{"a": 1}'))
+
+        stored = store.get('first')
+        self.assertIsNone(stored.content)
+        self.assertEqual(os.path.dirname(stored.path), tempfile.gettempdir())
+        store.close()
+        self.assertFalse(os.path.exists(stored.path))
+
+    def test_compared_by_runner(self):
+        server, url = serve(JsonHandler)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                ResponseStore.spill_directory = tmp
+                ResponseStore.memory_limit = 0
+                requests = Parser().parse(dedent(CODE + '###\nGET {url}/c\n\n<> first\n').format(url=url))
+                with HttpRunner(requests, ignore_headers=True) as runner:
+                    callback = runner.run()
+                    self.assertEqual(os.listdir(tmp), [])
+        finally:
+            shutdown(server)
+
+        self.assertEqual([(f.request.target, f.error) for f in callback.failures],
+                         [(url + '/c', 'Response body mismatch.\n$.path: "/c" != "/a"')])
+
+    def test_removed_after_concurrent_run(self):
+        server, url = serve(JsonHandler)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                ResponseStore.spill_directory = tmp
+                ResponseStore.memory_limit = 0
+                path = os.path.join(tmp, 'a.http')
+                with open(path, 'w') as f:
+                    # first stays referenced, as the request referencing it can't be sent
+                    f.write(dedent(CODE + '###\nGET http://127.0.0.1:1/\n\n<> first\n').format(url=url))
+                list(run_files([path, path], tmp, concurrency=2))
+                self.assertEqual(os.listdir(tmp), ['a.http'])
+        finally:
+            shutdown(server)
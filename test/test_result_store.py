@@ -0,0 +1,145 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from bogi.callbacks import CallbackBase
+from bogi.http_runner import HttpRunner
+from bogi.parser.main import Parser
+from bogi.result_store import RequestResults, ResultRow, ResultStore
+from test.utils import dedent, serve, shutdown
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.send_response(int(self.path.split('/')[-1]))
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def _row(request, response_time, success=True):
+    return ResultRow(file='a.http', request=request, method='GET', url='http://example.com/', success=success,
+                     status_code=200, latency=response_time, response_time=response_time, dns=0, connect=0, tls=0,
+                     ttfb=response_time, download=0, handler=0, error=None, timestamp=time.time())
+
+
+class ResultStoreTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.url = serve(StatusHandler)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown(cls.server)
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'results.db')
+        self.store = ResultStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.dir)
+
+    def _report(self, rows):
+        run_id = self.store.start_run()
+        results = RequestResults()
+        results.rows = rows
+        self.store.report(run_id, results)
+        self.store.finish_run(run_id)
+        return run_id
+
+    def test_results_stored(self):
+        callback = CallbackBase()
+        callback.results = RequestResults('a.http')
+        requests = Parser().parse(dedent('''
+        ### ok
+        GET {url}/200
+
+        >STATUS 200
+        ###
+        GET {url}/500
+
+        >STATUS 200
+        ''').format(url=self.url))
+        with HttpRunner(requests, ignore_headers=True, callback=callback) as runner:
+            runner.run()
+
+        run_id = self.store.start_run()
+        self.store.report(run_id, callback.results)
+        self.store.finish_run(run_id)
+
+        db = sqlite3.connect(self.path)
+        rows = db.execute('SELECT run_id, file, request, success, status_code, error, response_time > 0, ttfb > 0 '
+                          'FROM results ORDER BY request DESC').fetchall()
+        finished, = db.execute('SELECT finished FROM runs WHERE id = ?', (run_id,)).fetchone()
+        db.close()
+        self.assertEqual(rows, [
+            (run_id, 'a.http', 'ok', 1, 200, None, 1, 1),
+            (run_id, 'a.http', self.url + '/500', 0, 500, 'Expected status code 200, but got 500', 1, 1),
+        ])
+        self.assertIsNotNone(finished)
+
+    def test_failed_handler_stored_once(self):
+        callback = CallbackBase()
+        callback.results = RequestResults('a.http')
+        requests = Parser().parse(dedent('''
+        GET {url}/200
+
+        > {{% python
+        assert False, 'failed'
+        %}}
+        ''').format(url=self.url))
+        with HttpRunner(requests, ignore_headers=True, callback=callback) as runner:
+            runner.run()
+
+        run_id = self.store.start_run()
+        self.store.report(run_id, callback.results)
+        self.store.finish_run(run_id)
+
+        db = sqlite3.connect(self.path)
+        rows = db.execute('SELECT success, error FROM results WHERE run_id = ?', (run_id,)).fetchall()
+        db.close()
+        self.assertEqual(rows, [(0, 'failed')])
+
+    def test_percentiles_over_last_runs(self):
+        self._report([_row('a', 1000), _row('b', 5)])
+        for i in range(1, 21):
+            self._report([_row('a', float(i)), _row('a', 0, success=False)])
+
+        a, = self.store.percentiles(percentile=95, runs=20, request='a')
+        self.assertEqual((a.request, a.runs, a.samples, a.value), ('a', 20, 20, 19.0))
+        self.assertEqual([p.request for p in self.store.percentiles(runs=21)], ['a', 'b'])
+
+    def test_regressions(self):
+        for _ in range(5):
+            self._report([_row('a', 10.0), _row('b', 10.0)])
+        run_id = self._report([_row('a', 30.0), _row('b', 12.0), _row('new', 100.0)])
+
+        regression, = self.store.regressions(run_id, baseline_runs=5, threshold=1.5, min_samples=5)
+        self.assertEqual((regression.request, regression.value, regression.baseline), ('a', 30.0, 10.0))
+        self.assertEqual(regression.ratio, 3.0)
+        # too few samples to compare to
+        self.assertEqual(self.store.regressions(run_id, baseline_runs=2, min_samples=5), [])
+
+    def test_baseline_runs_of_each_request(self):
+        # files running in turns, like with --schedule
+        for _ in range(5):
+            self._report([_row('a', 10.0)])
+            self._report([_row('b', 10.0)])
+        for _ in range(5):
+            self._report([_row('b', 10.0)])
+        run_id = self._report([_row('a', 30.0), _row('b', 10.0)])
+
+        regression, = self.store.regressions(run_id, baseline_runs=5, min_samples=5)
+        self.assertEqual((regression.request, regression.value, regression.baseline), ('a', 30.0, 10.0))
+        self.assertEqual([(p.request, p.runs, p.value) for p in self.store.percentiles(runs=5)],
+                         [('a', 5, 30.0), ('b', 5, 10.0)])
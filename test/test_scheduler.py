@@ -0,0 +1,67 @@
+import threading
+import time
+import unittest
+
+from bogi.parser.main import Parser
+from bogi.scheduler import ScheduledFile, Scheduler, file_interval, parse_duration
+from test.utils import dedent
+
+
+class SchedulerTests(unittest.TestCase):
+
+    def _run_for(self, scheduler, seconds):
+        thread = threading.Thread(target=scheduler.run)
+        thread.start()
+        time.sleep(seconds)
+        scheduler.stop()
+        thread.join()
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration('500ms'), 0.5)
+        self.assertEqual(parse_duration('30s'), 30)
+        self.assertEqual(parse_duration('5m'), 300)
+        self.assertEqual(parse_duration('2'), 2)
+        with self.assertRaises(ValueError):
+            parse_duration('soon')
+
+    def test_file_interval(self):
+        requests = Parser().parse(dedent('''
+        # @interval 30s
+        GET http://localhost/a
+        ###
+        // @interval 5s
+        // @no-redirect
+        GET http://localhost/b
+        '''))
+        self.assertEqual(file_interval(requests, default=10), 5)
+        self.assertEqual(file_interval(requests[:0], default=10), 10)
+
+    def test_files_run_on_their_own_interval(self):
+        starts = {'fast': [], 'slow': []}
+
+        def run_file(path):
+            starts[path].append(time.monotonic())
+            if path == 'slow':
+                time.sleep(0.3)
+
+        scheduler = Scheduler([ScheduledFile('fast', 0.05), ScheduledFile('slow', 0.5)], run_file, jitter=0)
+        self._run_for(scheduler, 0.52)
+
+        # the slow file doesn't hold up the fast one, and the fast one doesn't drift
+        self.assertGreaterEqual(len(starts['fast']), 9)
+        self.assertEqual(len(starts['slow']), 2)
+        self.assertAlmostEqual(starts['fast'][-1] - starts['fast'][0], (len(starts['fast']) - 1) * 0.05, delta=0.03)
+
+    def test_overlapping_runs_are_missed(self):
+        runs = []
+
+        def run_file(path):
+            runs.append(path)
+            time.sleep(0.25)
+
+        scheduler = Scheduler([ScheduledFile('slow', 0.1)], run_file, jitter=0)
+        self._run_for(scheduler, 0.35)
+
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(scheduler.runs['slow'], 2)
+        self.assertGreaterEqual(scheduler.missed['slow'], 2)
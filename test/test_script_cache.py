@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+import js2py
+
+from bogi.response_handler import HttpClient, Variables
+from bogi.script_cache import ScriptCache
+
+
+class ScriptCacheTests(unittest.TestCase):
+
+    def test_compiled_once(self):
+        cache = ScriptCache()
+        code = cache.compile('var a = 1;')
+        self.assertIs(cache.compile('var a = 1;'), code)
+        self.assertIsNot(cache.compile('var a = 2;'), code)
+
+    def test_execute(self):
+        out = Variables()
+        ScriptCache().execute('out.set("res", a + 1);', {'a': 1, 'out': out})
+        self.assertEqual(out.dict, {'res': 2})
+
+    def test_contexts_reset_between_runs(self):
+        cache = ScriptCache()
+        cache.execute('var leaked = 1;', {})
+        out = Variables()
+        cache.execute('out.set("res", typeof leaked);', {'out': out})
+        self.assertEqual(out.dict, {'res': 'undefined'})
+
+    def test_script_errors_raised(self):
+        with self.assertRaises(js2py.internals.simplex.JsException):
+            ScriptCache().execute('undefinedFunction();', {})
+
+        with self.assertRaises(Exception):
+            ScriptCache().execute('client.assert(false, "failed");', {'client': HttpClient()})
+
+    def test_disk_cache(self):
+        script = 'out.set("res", 1);'
+        with tempfile.TemporaryDirectory() as cache_dir:
+            ScriptCache(cache_dir).compile(script)
+            files = os.listdir(cache_dir)
+            self.assertEqual(len(files), 1)
+
+            # a new cache uses the saved translation instead of translating again
+            with open(os.path.join(cache_dir, files[0]), 'w', encoding='utf-8') as f:
+                f.write('var.get("out").callprop("set", Js("res"), Js(42))')
+            out = Variables()
+            ScriptCache(cache_dir).execute(script, {'out': out})
+            self.assertEqual(out.dict, {'res': 42})
@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+import unittest
+
+BOGI = os.path.join(os.path.dirname(__file__), '..', 'bogi.py')
+
+
+class StartupTests(unittest.TestCase):
+
+    def test_optional_dependencies_imported_on_demand(self):
+        res = subprocess.run([sys.executable, '-X', 'importtime', BOGI, '--help'],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        imported = {line.split('|')[-1].strip().split('.')[0] for line in res.stderr.splitlines()}
+        self.assertNotIn('js2py', imported)
+        self.assertNotIn('elasticsearch', imported)
+        self.assertNotIn('httpx', imported)
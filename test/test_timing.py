@@ -0,0 +1,73 @@
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from bogi.http_runner import HttpRunner
+from bogi.parser.main import Parser
+from test.utils import dedent, serve, shutdown
+
+
+class SlowBodyHandler(BaseHTTPRequestHandler):
+    """
+    Waits 50ms before sending the response headers, and 50ms more before sending the body.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(0.05)
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.flush()
+        time.sleep(0.05)
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+class TimingTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.url = serve(SlowBodyHandler)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown(cls.server)
+
+    def test_phases(self):
+        requests = Parser().parse(dedent('''
+        GET {url}/a
+
+        > {{% python
+        import time
+        time.sleep(0.02)
+        %}}
+        ###
+        GET {url}/b
+        ''').format(url=self.url))
+        with HttpRunner(requests, ignore_headers=True) as runner:
+            first, second = runner.run().successes
+
+        self.assertGreater(first.timings.connect, 0)
+        self.assertEqual(first.timings.tls, 0)
+        self.assertGreaterEqual(first.timings.ttfb, 45)
+        self.assertGreaterEqual(first.timings.download, 45)
+        self.assertGreaterEqual(first.timings.handler, 20)
+        self.assertGreaterEqual(first.latency, 45)
+        self.assertGreaterEqual(first.response_time, 90)
+        self.assertLess(first.response_time, 1000)
+
+        # the connection is reused
+        self.assertEqual(second.timings.dns, 0)
+        self.assertEqual(second.timings.connect, 0)
+
+    def test_failed_request_timings(self):
+        requests = Parser().parse('GET http://127.0.0.1:1/\n')
+        with HttpRunner(requests, ignore_headers=True) as runner:
+            failure, = runner.run().failures
+
+        self.assertEqual(failure.response_time, -1)
+        self.assertGreater(failure.timings.connect, 0)
+        self.assertEqual(failure.timings.ttfb, 0)
@@ -0,0 +1,107 @@
+import os
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import urllib3
+
+from bogi.http_runner import HttpRunner
+from bogi.parser.main import Parser
+from bogi.transport import Transport, TransportSession
+from test.utils import dedent, serve, shutdown
+
+
+class CookieHandler(BaseHTTPRequestHandler):
+    """
+    Keeps connections alive, `/set` sets a cookie and every response echoes the Cookie header.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = (self.headers.get('Cookie') or '').encode('utf-8')
+        self.send_response(200)
+        if self.path == '/set':
+            self.send_header('Set-Cookie', 'a=1; Path=/')
+        if self.headers.get('Connection') == 'close':
+            self.send_header('Connection', 'close')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TransportTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server, cls.url = serve(CookieHandler)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown(cls.server)
+
+    def _run(self, code):
+        requests = Parser().parse(dedent(code).format(url=self.url))
+        with HttpRunner(requests, ignore_headers=True) as runner:
+            runner.run()
+        return runner
+
+    def test_connections_shared_cookies_not(self):
+        # warms up the pool
+        self._run('GET {url}/')
+        connections = Transport.stats.counts['connections']
+
+        runner = self._run('GET {url}/set')
+        requests = Parser().parse(dedent('''
+        GET {url}/
+        ###
+        // @no-cookie-jar
+        GET {url}/
+        ''').format(url=self.url))
+        with HttpRunner(requests, ignore_headers=True) as other:
+            responses = [other._execute_request(req).text for req in requests]
+            same_jar = runner._execute_request(requests[0]).text
+
+        self.assertEqual(responses, ['', ''])
+        self.assertEqual(same_jar, 'a=1')
+        self.assertEqual(Transport.stats.counts['connections'], connections)
+        self.assertGreater(Transport.stats.hit_rate, 0)
+
+
+@unittest.skipUnless(shutil.which('openssl'), 'needs openssl to make a certificate')
+class TlsResumptionTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cert, key = os.path.join(cls.tmp.name, 'cert.pem'), os.path.join(cls.tmp.name, 'key.pem')
+        subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-keyout', key, '-out', cert,
+                        '-days', '1', '-subj', '/CN=localhost'], check=True, capture_output=True)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), CookieHandler)
+        cls.server.socket = context.wrap_socket(cls.server.socket, server_side=True)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = 'https://127.0.0.1:{}/'.format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown(cls.server)
+        cls.tmp.cleanup()
+
+    def test_session_resumed(self):
+        before = Transport.stats.counts.copy()
+        with self.assertWarns(urllib3.exceptions.InsecureRequestWarning):
+            for _ in range(3):
+                # a new connection every time
+                TransportSession().get(self.url, verify=False, headers={'Connection': 'close'})
+
+        self.assertEqual(Transport.stats.counts['tls_handshakes'] - before['tls_handshakes'], 3)
+        self.assertEqual(Transport.stats.counts['tls_resumed'] - before['tls_resumed'], 2)
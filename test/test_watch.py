@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from bogi.http_runner import HttpRunner
+from bogi.watch import FileWatcher
+
+
+class FileWatcherTests(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.body = os.path.join(self.dir, 'body.json')
+        self._write('a.http', 'GET http://example.com/a\n\n> scripts/check.js\n')
+        self._write('b.http', f'POST http://example.com/b\n\n< {self.body}\n')
+        self._write('scripts/check.js', 'client.log("a");\n')
+        self._write('body.json', '{}\n')
+        self._write('other.txt', '')
+        self.watcher = FileWatcher(self.dir, self.dir)
+        self.watcher.interval = 0.01
+        self.watcher.debounce = 0.05
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def _names(self, paths):
+        return sorted(os.path.basename(p) for p in paths)
+
+    def test_nothing_changed(self):
+        self._write('other.txt', 'not watched')
+        self.assertEqual(self.watcher.poll(), set())
+
+    def test_changed_http_file(self):
+        self._write('a.http', 'GET http://example.com/changed\n')
+        self.assertEqual(self._names(self.watcher.wait()), ['a.http'])
+
+    def test_changed_script(self):
+        HttpRunner.response_handler_scripts['scripts/check.js'] = 'client.log("a");\n'
+        self._write('scripts/check.js', 'client.log("changed");\n')
+
+        self.assertEqual(self._names(self.watcher.wait()), ['a.http'])
+        self.assertNotIn('scripts/check.js', HttpRunner.response_handler_scripts)
+
+    def test_changed_body_file(self):
+        self._write('body.json', '{"changed": true}\n')
+        self.assertEqual(self._names(self.watcher.wait()), ['b.http'])
+
+    def test_changes_debounced(self):
+        self.watcher.debounce = 0.5
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self.watcher.wait)
+            self._write('body.json', '{"changed": true}\n')
+            time.sleep(0.1)
+            self._write('scripts/check.js', 'client.log("changed");\n')
+            self.assertEqual(self._names(future.result(timeout=5)), ['a.http', 'b.http'])
+
+    def test_new_dependency_watched(self):
+        self._write('c.http', 'POST http://example.com/c\n\n< ./new.json\n')
+        cwd = os.getcwd()
+        os.chdir(self.dir)
+        try:
+            self.assertEqual(self._names(self.watcher.wait()), ['c.http'])
+            self._write('new.json', '{}\n')
+            self.assertEqual(self._names(self.watcher.wait()), ['c.http'])
+        finally:
+            os.chdir(cwd)
+
+    def test_removed_http_file(self):
+        os.remove(os.path.join(self.dir, 'a.http'))
+        self._write('scripts/check.js', 'client.log("changed");\n')
+        self._write('body.json', '{"changed": true}\n')
+        self.assertEqual(self._names(self.watcher.wait()), ['b.http'])
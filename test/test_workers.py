@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from bogi.workers import FileRuntimes, RequestSummary, WorkerError, run_in_workers, shard
+from test.utils import serve, shutdown
+
+
+class OkHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.send_response(200 if self.path == '/ok' else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class WorkersTests(unittest.TestCase):
+
+    def test_shard_balances_by_runtime(self):
+        runtimes = FileRuntimes()
+        for path, runtime in [('a.http', 10), ('b.http', 6), ('c.http', 4), ('d.http', 1), ('e.http', 1)]:
+            runtimes.update(path, runtime)
+
+        shards = shard(['a.http', 'b.http', 'c.http', 'd.http', 'e.http'], 2, runtimes)
+
+        self.assertEqual(shards, [['a.http', 'd.http'], ['b.http', 'c.http', 'e.http']])
+
+    def test_shard_unknown_runtimes(self):
+        runtimes = FileRuntimes()
+        runtimes.update('a.http', 3)
+
+        shards = shard(['a.http', 'b.http', 'c.http'], 4, runtimes)
+
+        self.assertEqual(sorted(len(s) for s in shards), [1, 1, 1])
+
+    def test_runtimes_saved(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'runtimes.json')
+            runtimes = FileRuntimes(path)
+            runtimes.update('a.http', 2.0)
+            runtimes.update('a.http', 4.0)
+            runtimes.save()
+
+            self.assertEqual(FileRuntimes(path).get('a.http'), 3.0)
+
+    def test_run_in_workers(self):
+        server, url = serve(OkHandler)
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                paths = []
+                for name, code in [('ok.http', 'GET {url}/ok\n\n>STATUS 200'),
+                                   ('fail.http', 'GET {url}/missing\n\n>STATUS 200'),
+                                   ('broken.http', 'GET {url}/ok\n\n> ./missing.js')]:
+                    paths.append(os.path.join(tmp_dir, name))
+                    with open(paths[-1], 'w') as f:
+                        f.write(code.format(url=url))
+
+                results = {os.path.basename(r.path): r for r in
+                           run_in_workers(paths, tmp_dir, 2, FileRuntimes())}
+        finally:
+            shutdown(server)
+
+        self.assertEqual(len(results['ok.http'].callback.successes), 1)
+        self.assertEqual(results['ok.http'].callback.successes[0].request,
+                         RequestSummary(id=None, method='GET', target=url + '/ok'))
+        self.assertEqual(len(results['fail.http'].callback.failures), 1)
+        self.assertIsInstance(results['broken.http'].callback, WorkerError)
+        self.assertGreater(results['ok.http'].runtime, 0)
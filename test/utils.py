@@ -1,4 +1,21 @@
 import textwrap
+import threading
+from http.server import ThreadingHTTPServer
+
 
 def dedent(s):
-    return textwrap.dedent(s).lstrip()
\ No newline at end of file
+    return textwrap.dedent(s).lstrip()
+
+
+def serve(handler_class):
+    """
+    Starts a local HTTP server on a free port in a background thread, returning the server and its base URL.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+
+def shutdown(server):
+    server.shutdown()
+    server.server_close()